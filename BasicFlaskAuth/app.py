@@ -1,15 +1,23 @@
+import os
 from flask import Flask, request, abort
-import json
 from functools import wraps
 from jose import jwt
-from urllib.request import urlopen
+
+from jwks import JWKSKeyStore, LocalKeyStore
 
 
 app = Flask(__name__)
 
-AUTH0_DOMAIN = @TODO_REPLACE_WITH_YOUR_DOMAIN
+AUTH0_DOMAIN = os.environ.get('AUTH0_DOMAIN', 'TODO_REPLACE_WITH_YOUR_DOMAIN')
 ALGORITHMS = ['RS256']
-API_AUDIENCE = @TODO_REPLACE_WITH_YOUR_API_AUDIENCE
+API_AUDIENCE = os.environ.get('API_AUDIENCE', 'TODO_REPLACE_WITH_YOUR_API_AUDIENCE')
+
+# Set LOCAL_JWKS to a JWKS file or PEM public key to verify tokens offline,
+# i.e. ones issued by local_signer.py.
+if os.environ.get('LOCAL_JWKS'):
+    jwks_store = LocalKeyStore(os.environ['LOCAL_JWKS'])
+else:
+    jwks_store = JWKSKeyStore(f'https://{AUTH0_DOMAIN}/.well-known/jwks.json')
 
 
 class AuthError(Exception):
@@ -52,25 +60,14 @@ def get_token_auth_header():
 
 
 def verify_decode_jwt(token):
-    jsonurl = urlopen(f'https://{AUTH0_DOMAIN}/.well-known/jwks.json')
-    jwks = json.loads(jsonurl.read())
     unverified_header = jwt.get_unverified_header(token)
-    rsa_key = {}
     if 'kid' not in unverified_header:
         raise AuthError({
             'code': 'invalid_header',
             'description': 'Authorization malformed.'
         }, 401)
 
-    for key in jwks['keys']:
-        if key['kid'] == unverified_header['kid']:
-            rsa_key = {
-                'kty': key['kty'],
-                'kid': key['kid'],
-                'use': key['use'],
-                'n': key['n'],
-                'e': key['e']
-            }
+    rsa_key = jwks_store.get_key(unverified_header['kid'])
     if rsa_key:
         try:
             payload = jwt.decode(
@@ -0,0 +1,138 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.request import urlopen
+
+
+def b64_uint(n):
+    return base64.urlsafe_b64encode(n.to_bytes((n.bit_length() + 7) // 8, 'big')).rstrip(b'=').decode()
+
+
+def rsa_key_id(key):
+    """A stable kid for an RSA key (pycryptodome), derived from its modulus
+    and exponent so the signer and the key store agree on it
+    """
+    return hashlib.sha256(('%x.%x' % (key.n, key.e)).encode()).hexdigest()[:16]
+
+
+def rsa_jwk(key, kid=None):
+    """The public JWK of an RSA key (pycryptodome)
+    """
+    return {
+        'kty': 'RSA',
+        'kid': kid or rsa_key_id(key),
+        'use': 'sig',
+        'n': b64_uint(key.n),
+        'e': b64_uint(key.e)
+    }
+
+
+class JWKSKeyStore:
+    """Caches the signing keys published at a JWKS url, by key id (kid).
+
+    Keys are fetched once and reused for `ttl` seconds. A token signed with
+    a kid we don't know triggers an early refresh (the issuer may have
+    rotated its keys), but at most once every `min_refresh_interval` seconds
+    so tokens with made-up kids can't make us hammer the issuer. Threads
+    that need a refresh at the same time share a single fetch.
+    """
+
+    def __init__(self, url, ttl=600, min_refresh_interval=30, timeout=5,
+                 clock=time.monotonic):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.clock = clock
+
+        self.keys = {}
+        self.fetched_at = None
+        self.fetches = 0
+        self.refresh_lock = threading.Lock()
+
+    def fetch(self):
+        """Downloads the JWKS and returns the RSA keys it contains by kid
+        """
+        with urlopen(self.url, timeout=self.timeout) as response:
+            return self.parse(json.loads(response.read()))
+
+    @staticmethod
+    def parse(jwks):
+        return {key['kid']: {
+                    'kty': key['kty'],
+                    'kid': key['kid'],
+                    'use': key['use'],
+                    'n': key['n'],
+                    'e': key['e']
+                } for key in jwks['keys'] if key.get('kty') == 'RSA'}
+
+    def reset(self):
+        """Makes the next get_key fetch the keys again (the current ones stay
+        in use until then)
+        """
+        with self.refresh_lock:
+            self.fetched_at = None
+
+    def refresh(self, seen_fetches):
+        """Refreshes the keys unless another thread did since the caller
+        looked at them (seen_fetches), in which case its result is reused.
+        """
+        with self.refresh_lock:
+            if self.fetches != seen_fetches:
+                return
+            try:
+                keys = self.fetch()
+                fetched_at = self.clock()
+            except Exception:
+                # Keep serving the keys we have rather than failing every
+                # request while the issuer is unreachable, and try again
+                # after min_refresh_interval.
+                if not self.keys:
+                    raise
+                keys = self.keys
+                fetched_at = self.clock() - self.ttl + self.min_refresh_interval
+            self.keys = keys
+            self.fetched_at = fetched_at
+            self.fetches += 1
+
+    def get_key(self, kid):
+        """Returns the JWK for kid, or None if the issuer doesn't publish it
+        """
+        fetches, fetched_at = self.fetches, self.fetched_at
+        if fetched_at is None:
+            self.refresh(fetches)
+            return self.keys.get(kid)
+
+        age = self.clock() - fetched_at
+        if age >= self.ttl or (kid not in self.keys and age >= self.min_refresh_interval):
+            self.refresh(fetches)
+
+        return self.keys.get(kid)
+
+
+class LocalKeyStore(JWKSKeyStore):
+    """Serves the keys in a local file instead of the issuer's jwks.json, so
+    tokens can be verified offline (see local_signer.py).
+
+    The file is either a JWKS document or an RSA public key in PEM format,
+    whose kid is rsa_key_id(key) unless one is given. It is re-read every
+    `ttl` seconds like a JWKS url would be refetched.
+    """
+
+    def __init__(self, path, kid=None, **kwargs):
+        super().__init__('file://' + os.path.abspath(path), **kwargs)
+        self.path = path
+        self.kid = kid
+
+    def fetch(self):
+        with open(self.path) as f:
+            data = f.read()
+
+        if data.lstrip().startswith('-----BEGIN'):
+            from Crypto.PublicKey import RSA
+            jwk = rsa_jwk(RSA.import_key(data).publickey(), self.kid)
+            return {jwk['kid']: jwk}
+        return self.parse(json.loads(data))
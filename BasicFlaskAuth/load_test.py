@@ -0,0 +1,86 @@
+"""Measures authenticated requests/sec through requires_auth, offline.
+
+Tokens are issued by a local signer and verified against its key file, with
+the key store kept warm or reset before every request (cold), next to an
+unauthenticated route as a baseline.
+
+    python load_test.py --requests 2000 --threads 1 4
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+# Verify against a throwaway local key unless one is configured.
+os.environ.setdefault('AUTH0_DOMAIN', 'local.test')
+os.environ.setdefault('API_AUDIENCE', 'local')
+if not os.environ.get('LOCAL_JWKS'):
+    from local_signer import LocalSigner
+    key_dir = tempfile.mkdtemp()
+    LocalSigner.generate(os.environ['AUTH0_DOMAIN'], os.environ['API_AUDIENCE']).save(key_dir)
+    os.environ['LOCAL_JWKS'] = os.path.join(key_dir, 'jwks.json')
+    os.environ['LOCAL_SIGNER_KEYS'] = key_dir
+
+from app import app, requires_auth, jwks_store
+from local_signer import LocalSigner
+
+
+@app.route('/load-test/public')
+def load_test_public():
+    return 'ok'
+
+
+@app.route('/load-test/private')
+@requires_auth
+def load_test_private(payload):
+    return 'ok'
+
+
+def run(url, headers, num_requests, num_threads, before_request=None):
+    """Sends num_requests GETs from num_threads threads, returns requests/sec
+    """
+    per_thread = num_requests // num_threads
+    failures = []
+
+    def worker():
+        client = app.test_client()
+        for _ in range(per_thread):
+            if before_request:
+                before_request()
+            response = client.get(url, headers=headers)
+            if response.status_code != 200:
+                failures.append(response.status_code)
+
+    threads = [threading.Thread(target=worker) for _ in range(num_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if failures:
+        raise SystemExit('%d requests to %s failed, i.e. %d' % (len(failures), url, failures[0]))
+    return per_thread * num_threads / elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--keys', default=os.environ.get('LOCAL_SIGNER_KEYS'),
+                        help='directory written by local_signer.py keys (matching LOCAL_JWKS)')
+    args = parser.parse_args()
+
+    signer = LocalSigner.load(args.keys, os.environ['AUTH0_DOMAIN'], os.environ['API_AUDIENCE'])
+    headers = {'Authorization': 'Bearer ' + signer.issue()}
+
+    print('%8s %14s %14s %14s' % ('threads', 'no auth req/s', 'cold req/s', 'warm req/s'))
+    for num_threads in args.threads:
+        baseline = run('/load-test/public', {}, args.requests, num_threads)
+        cold = run('/load-test/private', headers, args.requests, num_threads, jwks_store.reset)
+        jwks_store.get_key(signer.kid)
+        warm = run('/load-test/private', headers, args.requests, num_threads)
+        print('%8d %14.0f %14.0f %14.0f' % (num_threads, baseline, cold, warm))
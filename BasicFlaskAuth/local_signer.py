@@ -0,0 +1,90 @@
+"""Issues test tokens signed with a local RSA key, for running and
+load-testing the app without Auth0.
+
+    python local_signer.py keys keys/
+    export LOCAL_JWKS=keys/jwks.json AUTH0_DOMAIN=local.test API_AUDIENCE=local
+    python local_signer.py token keys/ --permission get:headers
+"""
+import argparse
+import json
+import os
+import time
+
+from Crypto.PublicKey import RSA
+from jose import jwt
+
+from jwks import rsa_jwk, rsa_key_id
+
+
+class LocalSigner:
+    """Signs RS256 tokens the way Auth0 would for `domain` and `audience`
+    """
+
+    def __init__(self, private_key, domain, audience):
+        self.key = RSA.import_key(private_key)
+        self.kid = rsa_key_id(self.key)
+        self.private_pem = self.key.export_key('PEM').decode()
+        self.issuer = 'https://' + domain + '/'
+        self.audience = audience
+
+    @classmethod
+    def generate(cls, domain, audience, bits=2048):
+        return cls(RSA.generate(bits).export_key('PEM'), domain, audience)
+
+    @classmethod
+    def load(cls, directory, domain, audience):
+        with open(os.path.join(directory, 'private.pem')) as f:
+            return cls(f.read(), domain, audience)
+
+    def jwks(self):
+        return {'keys': [rsa_jwk(self.key.publickey(), self.kid)]}
+
+    def save(self, directory):
+        """Writes private.pem, and the public key as public.pem and jwks.json
+        """
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'private.pem'), 'w') as f:
+            f.write(self.private_pem)
+        with open(os.path.join(directory, 'public.pem'), 'w') as f:
+            f.write(self.key.publickey().export_key('PEM').decode())
+        with open(os.path.join(directory, 'jwks.json'), 'w') as f:
+            json.dump(self.jwks(), f, indent=2)
+
+    def issue(self, subject='local|test-user', permissions=(), expires_in=3600, **claims):
+        now = int(time.time())
+        payload = {
+            'iss': self.issuer,
+            'sub': subject,
+            'aud': self.audience,
+            'iat': now,
+            'exp': now + expires_in,
+            'permissions': list(permissions)
+        }
+        payload.update(claims)
+        return jwt.encode(payload, self.private_pem, algorithm='RS256', headers={'kid': self.kid})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--domain', default=os.environ.get('AUTH0_DOMAIN', 'local.test'))
+    parser.add_argument('--audience', default=os.environ.get('API_AUDIENCE', 'local'))
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    keys_parser = subparsers.add_parser('keys', help='generate a key pair and its jwks.json')
+    keys_parser.add_argument('directory')
+    keys_parser.add_argument('--bits', type=int, default=2048)
+
+    token_parser = subparsers.add_parser('token', help='print a token signed with the saved key')
+    token_parser.add_argument('directory')
+    token_parser.add_argument('--subject', default='local|test-user')
+    token_parser.add_argument('--permission', action='append', default=[])
+    token_parser.add_argument('--expires-in', type=int, default=3600)
+
+    args = parser.parse_args()
+    if args.command == 'keys':
+        LocalSigner.generate(args.domain, args.audience, args.bits).save(args.directory)
+    else:
+        signer = LocalSigner.load(args.directory, args.domain, args.audience)
+        print(signer.issue(args.subject, args.permission, args.expires_in))
@@ -0,0 +1,140 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from jose import jwt
+
+from jwks import JWKSKeyStore, LocalKeyStore
+from local_signer import LocalSigner
+
+
+def make_key(kid):
+    return {'kty': 'RSA', 'kid': kid, 'use': 'sig', 'n': 'n-' + kid, 'e': 'AQAB'}
+
+
+class JWKSHandler(BaseHTTPRequestHandler):
+    """Stand-in for https://<domain>/.well-known/jwks.json"""
+
+    def do_GET(self):
+        self.server.requests += 1
+        time.sleep(self.server.delay)
+        body = json.dumps({'keys': self.server.keys}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class JWKSKeyStoreTestCase(unittest.TestCase):
+    """This class represents the JWKS key store test case"""
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), JWKSHandler)
+        self.server.keys = [make_key('key-1')]
+        self.server.requests = 0
+        self.server.delay = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.clock = FakeClock()
+        self.store = JWKSKeyStore(
+            'http://127.0.0.1:%d/.well-known/jwks.json' % self.server.server_port,
+            ttl=600, min_refresh_interval=30, clock=self.clock)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_keys_are_fetched_once(self):
+        for _ in range(5):
+            self.assertEqual(self.store.get_key('key-1'), make_key('key-1'))
+        self.assertEqual(self.server.requests, 1)
+
+    def test_keys_are_refetched_after_ttl(self):
+        self.store.get_key('key-1')
+        self.clock.now += 601
+        self.store.get_key('key-1')
+        self.assertEqual(self.server.requests, 2)
+
+    def test_unknown_kid_refreshes_rotated_keys(self):
+        self.store.get_key('key-1')
+        self.server.keys = [make_key('key-1'), make_key('key-2')]
+        self.clock.now += 31
+        self.assertEqual(self.store.get_key('key-2'), make_key('key-2'))
+        self.assertEqual(self.server.requests, 2)
+
+    def test_unknown_kid_refreshes_at_most_once_per_interval(self):
+        self.store.get_key('key-1')
+        for _ in range(5):
+            self.assertIsNone(self.store.get_key('made-up'))
+        self.assertEqual(self.server.requests, 1)
+
+    def test_concurrent_refreshes_share_one_fetch(self):
+        self.server.delay = 0.2
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.store.get_key('key-1')))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [make_key('key-1')] * 10)
+        self.assertEqual(self.server.requests, 1)
+
+    def test_stale_keys_are_kept_when_the_issuer_is_down(self):
+        self.store.get_key('key-1')
+        self.server.shutdown()
+        self.server.server_close()
+        self.store.timeout = 0.5
+        self.clock.now += 601
+        self.assertEqual(self.store.get_key('key-1'), make_key('key-1'))
+
+
+class LocalKeyStoreTestCase(unittest.TestCase):
+    """This class represents the offline key store and signer test case"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.signer = LocalSigner.generate('local.test', 'local', bits=1024)
+        cls.key_dir = tempfile.mkdtemp()
+        cls.signer.save(cls.key_dir)
+
+    def verify(self, store, token):
+        key = store.get_key(jwt.get_unverified_header(token)['kid'])
+        return jwt.decode(token, key, algorithms=['RS256'], audience='local',
+                          issuer='https://local.test/')
+
+    def test_tokens_verify_against_jwks_file(self):
+        store = LocalKeyStore(os.path.join(self.key_dir, 'jwks.json'))
+        token = self.signer.issue(permissions=['get:headers'])
+        self.assertEqual(self.verify(store, token)['permissions'], ['get:headers'])
+
+    def test_tokens_verify_against_pem_file(self):
+        store = LocalKeyStore(os.path.join(self.key_dir, 'public.pem'))
+        self.assertEqual(self.verify(store, self.signer.issue())['sub'], 'local|test-user')
+
+    def test_tokens_from_another_key_are_unknown(self):
+        store = LocalKeyStore(os.path.join(self.key_dir, 'jwks.json'))
+        other = LocalSigner.generate('local.test', 'local', bits=1024)
+        self.assertIsNone(store.get_key(other.kid))
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import sys
+from flask import Blueprint, current_app, render_template, request, flash, redirect, url_for, abort
+from extensions import db
+from cache import response_cache
+from forms import ArtistForm
+from models import Artist
+from streaming import stream_template
+import queries
+
+
+bp = Blueprint('artists', __name__)
+
+
+#----------------------------------------------------------------------------#
+# Controllers.
+#----------------------------------------------------------------------------#
+
+#  Artists
+#  ----------------------------------------------------------------
+@bp.route('/artists')
+@response_cache.cached
+def artists():
+  # Done: replace with real data returned from querying the database
+
+  genre = request.args.get('genre')
+  response_cache.tag('artists')
+
+  if current_app.config['STREAM_LISTINGS']:
+    data = queries.artist_listing(yield_per=current_app.config['STREAM_YIELD_PER'], genre=genre)
+    return stream_template('pages/artists.html', artists=data)
+
+  data = queries.artist_listing(genre=genre)
+
+  return render_template('pages/artists.html', artists=data)
+
+@bp.route('/artists/search', methods=['POST'])
+def search_artists():
+  # Done: implement search on artists with partial string search. Ensure it is case-insensitive.
+  # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
+  # search for "band" should return "The Wild Sax Band".
+
+  search_string = request.form.get('search_term','')
+
+  response = queries.search_artists(search_string,
+                                    page=request.args.get('page', 1, type=int),
+                                    per_page=current_app.config['SEARCH_RESULTS_PER_PAGE'])
+
+  return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
+
+@bp.route('/artists/<int:artist_id>')
+@response_cache.cached
+def show_artist(artist_id):
+  # shows the venue page with the given venue_id
+  # Done: replace with real venue data from the venues table, using venue_id
+
+  response_cache.tag('artist:%d' % artist_id)
+  artist, past_shows, upcoming_shows = queries.artist_detail(artist_id)
+  if artist is None:
+    abort(404)
+  response_cache.tag(*['venue:%d' % s["venue_id"] for s in past_shows + upcoming_shows])
+
+  data={
+      "id": artist_id,
+      "name": artist.name,
+      "genres": [g.name for g in artist.genres],
+      "city": artist.city,
+      "state": artist.state,
+      "phone": artist.phone,
+      "website": artist.website,
+      "facebook_link": artist.facebook_link,
+      "seeking_venue": artist.seeking_venue,
+      "seeking_description": artist.seeking_description,
+      "image_link": artist.image_link,
+      "past_shows": past_shows,
+      "upcoming_shows": upcoming_shows,
+      "past_shows_count": len(past_shows),
+      "upcoming_shows_count": len(upcoming_shows),
+    }
+
+  return render_template('pages/show_artist.html', artist=data)
+
+#  Update Artist
+#  ----------------------------------------------------------------
+@bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+
+  artist_query = Artist.query.filter_by(id=artist_id).first_or_404()
+
+  artist={
+    "id": artist_query.id,
+    "name": artist_query.name,
+    "genres": [g.name for g in artist_query.genres],
+    "city": artist_query.city,
+    "state": artist_query.state,
+    "phone": artist_query.phone,
+    "website": artist_query.website,
+    "facebook_link": artist_query.facebook_link,
+    "seeking_venue": artist_query.seeking_venue,
+    "seeking_description": artist_query.seeking_description,
+    "image_link": artist_query.image_link
+  }
+
+  # Done: populate form with fields from artist with ID <artist_id>
+  form = ArtistForm(data=artist)
+
+  return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+  # Done: take values from the form submitted, and update existing
+  # artist record with ID <artist_id> using the new attributes
+
+  artist = Artist.query.filter_by(id=artist_id).first_or_404()
+  error = False
+
+  try:
+    form = ArtistForm(obj=artist)
+    if form.validate():
+      genres = request.form.getlist('genres')
+      # genres is a relationship, populate_obj can't assign the names to it
+      del form.genres
+      form.populate_obj(artist)
+      artist.genres = queries.genres_by_name(genres)
+      db.session.add(artist)
+      db.session.commit()
+    else:
+      print(form.errors)
+      error = True
+
+  except:
+    error = True
+    db.session.rollback()
+    print(sys.exc_info())
+
+  finally:
+    db.session.close()
+
+  if error:
+    # Done: on unsuccessful db insert, flash an error instead.
+    flash('An error occurred. Artist ' + request.form['name'] + ' could not be updated.')
+  else:
+    # on successful db insert, flash success
+    response_cache.invalidate('artists', 'shows', 'artist:%d' % artist_id)
+    flash('Artist ' + request.form['name'] + ' was successfully updated!')
+
+  return redirect(url_for('artists.show_artist', artist_id=artist_id))
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@bp.route('/artists/create', methods=['GET'])
+def create_artist_form():
+  form = ArtistForm()
+  return render_template('forms/new_artist.html', form=form)
+
+@bp.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+  # called upon submitting the new artist listing form
+  # Done: insert form data as a new Artist record in the db, instead
+
+  error = False
+
+  try:
+    artist_request = request.form
+    artist = Artist(name=artist_request['name'],
+                genres=queries.genres_by_name(artist_request.getlist('genres')),
+                city=artist_request['city'],
+                state=artist_request['state'],
+                phone=artist_request['phone'],
+                facebook_link=artist_request['facebook_link'],
+                image_link='https://dummyimage.com/600x400/000/fff.jpg&text='+artist_request['name']
+      )
+    db.session.add(artist)
+    db.session.commit()
+
+  except:
+    error = True
+    db.session.rollback()
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+
+  if error:
+    # Done: on unsuccessful db insert, flash an error instead.
+    flash('An error occurred. Artist ' + request.form['name'] + ' could not be listed.')
+  else:
+    # on successful db insert, flash success
+    response_cache.invalidate('artists')
+    flash('Artist ' + request.form['name'] + ' was successfully listed!')
+
+  return render_template('pages/home.html')
@@ -0,0 +1,423 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# The benchmarks seed and drop tables, so they run against a throwaway SQLite
+# file unless DATABASE_URL points at a scratch database.
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'fyyur_benchmark.db'))
+
+from sqlalchemy import event
+from app import create_app
+from extensions import db
+from cache import response_cache
+from models import Venue, Artist, Show, Genre, venue_genre, artist_genre
+import queries
+import counters
+
+# Measure the queries behind each page, not the response cache.
+app = create_app({'CACHE_ENABLED': False})
+
+
+#----------------------------------------------------------------------------#
+# Helpers.
+#----------------------------------------------------------------------------#
+
+class QueryCounter(object):
+  # Counts the statements sent to the database while active.
+
+  def __init__(self, engine):
+    self.engine = engine
+    self.count = 0
+
+  def _callback(self, conn, cursor, statement, parameters, context, executemany):
+    self.count += 1
+
+  def __enter__(self):
+    self.count = 0
+    event.listen(self.engine, 'before_cursor_execute', self._callback)
+    return self
+
+  def __exit__(self, *exc):
+    event.remove(self.engine, 'before_cursor_execute', self._callback)
+
+
+class QueryRecorder(QueryCounter):
+  # Records the statements (and their parameters) that read the show table.
+
+  def __enter__(self):
+    self.statements = []
+    return super(QueryRecorder, self).__enter__()
+
+  def _callback(self, conn, cursor, statement, parameters, context, executemany):
+    super(QueryRecorder, self)._callback(conn, cursor, statement, parameters, context, executemany)
+    if re.search(r'\b(FROM|JOIN) show\b', statement):
+      self.statements.append((statement, parameters))
+
+
+def explain(statement, parameters):
+  # Returns (plan text, True if the plan reads the show table sequentially).
+  connection = db.engine.raw_connection()
+  try:
+    cursor = connection.cursor()
+    if db.engine.dialect.name == 'sqlite':
+      cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+      lines = [row[-1] for row in cursor.fetchall()]
+      seq_scan = any(re.match(r'SCAN (TABLE )?show\b', l) and 'USING' not in l for l in lines)
+    else:
+      cursor.execute('EXPLAIN ' + statement, parameters)
+      lines = [row[0] for row in cursor.fetchall()]
+      seq_scan = any(re.search(r'Seq Scan on show\b', l) for l in lines)
+  finally:
+    connection.close()
+  return '\n'.join(lines), seq_scan
+
+
+def seed(num_venues, num_artists, num_shows, num_cities=50, num_genres=20):
+  if db.engine.dialect.name == 'postgresql':
+    db.engine.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+  db.drop_all()
+  db.create_all()
+
+  db.session.bulk_insert_mappings(Venue, [{"id": i + 1,
+                                           "name": "Venue %d" % i,
+                                           "address": "%d Main Street" % i,
+                                           "city": "City %d" % (i % num_cities),
+                                           "state": "CA"}
+                                          for i in range(num_venues)])
+  db.session.bulk_insert_mappings(Artist, [{"id": i + 1,
+                                            "name": "Artist %d" % i}
+                                           for i in range(num_artists)])
+
+  # Every venue and artist plays two of num_genres genres.
+  db.session.bulk_insert_mappings(Genre, [{"id": g + 1, "name": "Genre %d" % g}
+                                          for g in range(num_genres)])
+  db.session.execute(venue_genre.insert(), [{"venue_id": i + 1, "genre_id": (i + g) % num_genres + 1}
+                                            for i in range(num_venues) for g in range(2)])
+  db.session.execute(artist_genre.insert(), [{"artist_id": i + 1, "genre_id": (i + g) % num_genres + 1}
+                                             for i in range(num_artists) for g in range(2)])
+
+  # Half of the shows are in the past, half upcoming.
+  now = datetime.now()
+  db.session.bulk_insert_mappings(Show, [{"venue_id": i % num_venues + 1,
+                                          "artist_id": i % num_artists + 1,
+                                          "start_time": now + timedelta(days=(i % 730) - 365)}
+                                         for i in range(num_shows)])
+  db.session.commit()
+
+  for index in queries.search_indexes.values():
+    index.reset()
+  counters.reconcile_counts()
+
+
+def measure(client, method, url, repeat, **kwargs):
+  # Returns (queries per request, median milliseconds) for the given request.
+  client.open(url, method=method, **kwargs)
+
+  timings = []
+  with QueryCounter(db.engine) as counter:
+    for _ in range(repeat):
+      start = time.perf_counter()
+      response = client.open(url, method=method, **kwargs)
+      timings.append((time.perf_counter() - start) * 1000)
+      assert response.status_code == 200, response.status_code
+
+  return counter.count / repeat, statistics.median(timings)
+
+
+#----------------------------------------------------------------------------#
+# Benchmarks.
+#----------------------------------------------------------------------------#
+
+def bench_venues(args):
+  client = app.test_client()
+  for num_venues in args.venues:
+    seed(num_venues, args.artists, num_venues * args.shows_per_venue)
+    num_queries, ms = measure(client, 'GET', '/venues', args.repeat)
+    print('/venues  venues=%-7d shows=%-8d queries=%-5g median=%.1fms'
+          % (num_venues, num_venues * args.shows_per_venue, num_queries, ms))
+
+
+def bench_search(args):
+  client = app.test_client()
+  for num_rows in args.rows:
+    seed(num_rows, num_rows, num_rows * args.shows_per_row)
+    for url in ('/venues/search', '/artists/search'):
+      num_queries, ms = measure(client, 'POST', url, args.repeat, data={'search_term': args.term})
+      print('%-16s rows=%-7d term=%-6r queries=%-5g median=%.1fms'
+            % (url, num_rows, args.term, num_queries, ms))
+
+
+def bench_detail(args):
+  client = app.test_client()
+  seed(args.venues, args.artists, args.shows)
+  for url in ('/venues/1', '/artists/1'):
+    num_queries, ms = measure(client, 'GET', url, args.repeat)
+    print('%-11s shows=%-8d queries=%-5g median=%.1fms' % (url, args.shows, num_queries, ms))
+
+
+def check_explain(args):
+  # Regression check: every show query issued by the read pages must be served
+  # from an index once the tables are large. Exits with status 1 otherwise.
+  client = app.test_client()
+  seed(args.venues, args.artists, args.shows)
+  db.session.execute('ANALYZE')
+  db.session.commit()
+
+  pages = [('GET', '/venues', None),
+           ('GET', '/venues/1', None),
+           ('GET', '/artists/1', None),
+           ('GET', '/venues?genre=Genre%201', None),
+           ('GET', '/shows', None),
+           ('GET', '/shows?include_past=1&after=' + queries.encode_cursor(datetime.now(), 0), None),
+           ('POST', '/venues/search', {'search_term': 'Venue 1'}),
+           ('POST', '/artists/search', {'search_term': 'Artist 1'})]
+
+  failures = 0
+  for method, url, data in pages:
+    with QueryRecorder(db.engine) as recorder:
+      client.open(url, method=method, data=data)
+    for statement, parameters in recorder.statements:
+      plan, seq_scan = explain(statement, parameters)
+      print('%s %s %s' % ('SEQ SCAN' if seq_scan else 'ok      ', method, url))
+      if seq_scan or args.verbose:
+        print('    ' + plan.replace('\n', '\n    '))
+      failures += seq_scan
+
+  if failures:
+    print('%d show queries fall back to a sequential scan' % failures)
+    sys.exit(1)
+
+
+def bench_shows(args):
+  # Latency of the first page and of a page deep into the history.
+  client = app.test_client()
+  for num_shows in args.shows:
+    seed(args.venues, args.artists, num_shows)
+    oldest = db.session.query(db.func.min(Show.start_time)).scalar()
+    deep = datetime.now() - (datetime.now() - oldest) / 10
+    for url in ('/shows', '/shows?include_past=1&after=' + queries.encode_cursor(deep, 0)):
+      num_queries, ms = measure(client, 'GET', url, args.repeat)
+      print('%-9s shows=%-8d queries=%-5g median=%.1fms'
+            % ('deep' if 'after' in url else 'first', num_shows, num_queries, ms))
+
+
+def bench_stream(args):
+  # Time to first byte, total time and peak Python memory of the listing
+  # pages, rendered in one piece and streamed.
+  client = app.test_client()
+  for num_rows in args.rows:
+    seed(num_rows, num_rows, 0)
+    for url in ('/venues', '/artists'):
+      for stream in (False, True):
+        app.config['STREAM_LISTINGS'] = stream
+        tracemalloc.start()
+        start = time.perf_counter()
+        response = client.get(url, buffered=False)
+        chunks = iter(response.response)
+        next(chunks)
+        first_byte = (time.perf_counter() - start) * 1000
+        for chunk in chunks:
+          pass
+        response.close()
+        total = (time.perf_counter() - start) * 1000
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print('%-8s %-8s rows=%-7d first byte=%-8.1fms total=%-8.1fms peak=%.1fMB'
+              % (url, 'stream' if stream else 'render', num_rows, first_byte, total, peak / 2.0 ** 20))
+
+
+def bench_genre(args):
+  client = app.test_client()
+  for num_rows in args.rows:
+    seed(num_rows, num_rows, 0, num_genres=args.genres)
+    for url in ('/venues?genre=Genre%201', '/artists?genre=Genre%201'):
+      num_queries, ms = measure(client, 'GET', url, args.repeat)
+      print('%-25s rows=%-7d genres=%-4d queries=%-5g median=%.1fms'
+            % (url, num_rows, args.genres, num_queries, ms))
+
+
+def bench_cache(args):
+  # Uncached vs cached latency of the read pages, then the cache's counters
+  # after a write invalidated part of them.
+  client = app.test_client()
+  seed(args.venues, args.artists, args.shows)
+  urls = ['/venues', '/artists', '/shows', '/venues/1', '/artists/1']
+
+  for enabled in (False, True):
+    app.config['CACHE_ENABLED'] = enabled
+    response_cache.backend.clear()
+    for url in urls:
+      num_queries, ms = measure(client, 'GET', url, args.repeat)
+      print('%-6s %-11s queries=%-5g median=%.2fms'
+            % ('cached' if enabled else 'fresh', url, num_queries, ms))
+
+  response_cache.invalidate('venue:1')
+  for url in urls:
+    client.get(url)
+  print(response_cache.stats())
+  app.config['CACHE_ENABLED'] = False
+
+
+def bench_search_index(args):
+  # Compares a sequential scan against the name index: the pg_trgm index on
+  # PostgreSQL (disabled via the planner settings for the scan run), the
+  # in-process trigram index on SQLite.
+  seed(args.rows, args.rows, 0)
+  postgres = db.engine.dialect.name == 'postgresql'
+
+  # Pick terms from existing names so every search has matches.
+  random.seed(0)
+  terms = ['%d' % random.randrange(args.rows) for _ in range(args.searches)]
+
+  for use_index in (False, True):
+    if postgres:
+      setting = 'on' if use_index else 'off'
+      db.session.execute('SET enable_bitmapscan = %s' % setting)
+      db.session.execute('SET enable_indexscan = %s' % setting)
+    queries.search(Venue, 'warm-up', per_page=args.per_page, use_index=use_index)
+
+    timings = []
+    for term in terms:
+      start = time.perf_counter()
+      queries.search(Venue, 'Venue ' + term, per_page=args.per_page, use_index=use_index)
+      timings.append((time.perf_counter() - start) * 1000)
+    print('search %-5s rows=%-7d searches=%-5d median=%.2fms'
+          % ('index' if use_index else 'scan', args.rows, args.searches, statistics.median(timings)))
+
+  if postgres:
+    db.session.execute('RESET enable_bitmapscan')
+    db.session.execute('RESET enable_indexscan')
+
+
+# Runs in a fresh interpreter, so every phase starts cold.
+STARTUP_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+if sys.argv[1] == 'modules':
+  import models, queries
+  print(json.dumps([time.perf_counter() - start]))
+  sys.exit()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+client = application.test_client()
+assert client.get('/').status_code == 200
+first_request = time.perf_counter()
+assert client.get('/venues').status_code == 200
+first_query = time.perf_counter()
+print(json.dumps([imported - start, created - imported, first_request - created, first_query - first_request]))
+'''
+
+
+def bench_startup(args):
+  # Cold start of a worker: importing the app, create_app(), the first request
+  # and the first request that queries the database (which creates the
+  # engine), each the median of fresh interpreters. Also the import of the
+  # models and queries alone, which is what scripts and tests pay without
+  # building an app.
+  seed(5, 5, 10)
+  db.session.remove()
+
+  def cold(mode):
+    timings = []
+    for _ in range(args.repeat):
+      output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, mode], check=True,
+                              stdout=subprocess.PIPE, cwd=os.path.dirname(os.path.abspath(__file__)))
+      timings.append(json.loads(output.stdout))
+    return [statistics.median(phase) * 1000 for phase in zip(*timings)]
+
+  phases = cold('app')
+  for name, ms in zip(('import app', 'create_app()', 'first request', 'first query'), phases):
+    print('%-24s median=%.1fms' % (name, ms))
+  print('%-24s median=%.1fms' % ('total', sum(phases)))
+  print('%-24s median=%.1fms' % ('import models, queries', cold('modules')[0]))
+
+
+#----------------------------------------------------------------------------#
+# Launch.
+#----------------------------------------------------------------------------#
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Fyyur page benchmarks.')
+  subparsers = parser.add_subparsers(dest='benchmark')
+  subparsers.required = True
+
+  venues_parser = subparsers.add_parser('venues', help='/venues directory page')
+  venues_parser.add_argument('--venues', type=int, nargs='+', default=[5, 500, 50000])
+  venues_parser.add_argument('--artists', type=int, default=100)
+  venues_parser.add_argument('--shows-per-venue', type=int, default=4)
+  venues_parser.add_argument('--repeat', type=int, default=5)
+  venues_parser.set_defaults(func=bench_venues)
+
+  search_parser = subparsers.add_parser('search', help='venue and artist search')
+  search_parser.add_argument('--rows', type=int, nargs='+', default=[5, 500, 50000])
+  search_parser.add_argument('--term', default='a')
+  search_parser.add_argument('--shows-per-row', type=int, default=4)
+  search_parser.add_argument('--repeat', type=int, default=5)
+  search_parser.set_defaults(func=bench_search)
+
+  detail_parser = subparsers.add_parser('detail', help='venue and artist detail pages')
+  detail_parser.add_argument('--venues', type=int, default=10)
+  detail_parser.add_argument('--artists', type=int, default=10)
+  detail_parser.add_argument('--shows', type=int, default=10000)
+  detail_parser.add_argument('--repeat', type=int, default=5)
+  detail_parser.set_defaults(func=bench_detail)
+
+  explain_parser = subparsers.add_parser('explain', help='fail if a show query seq-scans')
+  explain_parser.add_argument('--venues', type=int, default=2000)
+  explain_parser.add_argument('--artists', type=int, default=2000)
+  explain_parser.add_argument('--shows', type=int, default=50000)
+  explain_parser.add_argument('--verbose', action='store_true')
+  explain_parser.set_defaults(func=check_explain)
+
+  shows_parser = subparsers.add_parser('shows', help='/shows listing pages')
+  shows_parser.add_argument('--venues', type=int, default=100)
+  shows_parser.add_argument('--artists', type=int, default=100)
+  shows_parser.add_argument('--shows', type=int, nargs='+', default=[1000, 100000])
+  shows_parser.add_argument('--repeat', type=int, default=5)
+  shows_parser.set_defaults(func=bench_shows)
+
+  stream_parser = subparsers.add_parser('stream', help='rendered vs streamed listings')
+  stream_parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000])
+  stream_parser.set_defaults(func=bench_stream)
+
+  genre_parser = subparsers.add_parser('genre', help='listings filtered by genre')
+  genre_parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000])
+  genre_parser.add_argument('--genres', type=int, default=100)
+  genre_parser.add_argument('--repeat', type=int, default=5)
+  genre_parser.set_defaults(func=bench_genre)
+
+  cache_parser = subparsers.add_parser('cache', help='read pages with and without the response cache')
+  cache_parser.add_argument('--venues', type=int, default=1000)
+  cache_parser.add_argument('--artists', type=int, default=1000)
+  cache_parser.add_argument('--shows', type=int, default=10000)
+  cache_parser.add_argument('--repeat', type=int, default=20)
+  cache_parser.set_defaults(func=bench_cache)
+
+  index_parser = subparsers.add_parser('search-index', help='name search, scan vs index')
+  index_parser.add_argument('--rows', type=int, default=100000)
+  index_parser.add_argument('--searches', type=int, default=200)
+  index_parser.add_argument('--per-page', type=int, default=50)
+  index_parser.set_defaults(func=bench_search_index)
+
+  startup_parser = subparsers.add_parser('startup', help='cold start time of a worker')
+  startup_parser.add_argument('--repeat', type=int, default=10)
+  startup_parser.set_defaults(func=bench_startup)
+
+  args = parser.parse_args()
+  with app.app_context():
+    args.func(args)
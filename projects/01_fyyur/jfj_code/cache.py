@@ -0,0 +1,180 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, make_response, request, session
+
+
+#----------------------------------------------------------------------------#
+# Backends.
+#----------------------------------------------------------------------------#
+
+class LocalBackend(object):
+  # In-process LRU with a TTL per entry. Tag versions live outside the LRU so
+  # they are never evicted (an evicted version would restart at 0 and could
+  # make an old entry valid again).
+
+  def __init__(self, max_entries=1024):
+    self.max_entries = max_entries
+    self.entries = OrderedDict()
+    self.tag_versions = {}
+    self.lock = threading.Lock()
+
+  def get(self, key):
+    with self.lock:
+      entry = self.entries.get(key)
+      if entry is None:
+        return None
+      value, expires = entry
+      if expires < time.monotonic():
+        del self.entries[key]
+        return None
+      self.entries.move_to_end(key)
+      return value
+
+  def set(self, key, value, ttl):
+    with self.lock:
+      self.entries[key] = (value, time.monotonic() + ttl)
+      self.entries.move_to_end(key)
+      while len(self.entries) > self.max_entries:
+        self.entries.popitem(last=False)
+
+  def versions(self, tags):
+    with self.lock:
+      return [self.tag_versions.get(tag, 0) for tag in tags]
+
+  def bump(self, tags):
+    with self.lock:
+      for tag in tags:
+        self.tag_versions[tag] = self.tag_versions.get(tag, 0) + 1
+
+  def clear(self):
+    with self.lock:
+      self.entries.clear()
+      self.tag_versions.clear()
+
+
+class RedisBackend(object):
+  # Shared by every worker, so a write handled by one worker invalidates the
+  # pages cached by all of them. Needs the redis package.
+
+  def __init__(self, url, prefix='fyyur:cache:'):
+    import redis
+    self.client = redis.Redis.from_url(url)
+    self.prefix = prefix
+
+  def get(self, key):
+    value = self.client.get(self.prefix + key)
+    return pickle.loads(value) if value is not None else None
+
+  def set(self, key, value, ttl):
+    self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl)
+
+  def versions(self, tags):
+    if not tags:
+      return []
+    return [int(v or 0) for v in self.client.mget([self.prefix + 'tag:' + t for t in tags])]
+
+  def bump(self, tags):
+    pipe = self.client.pipeline()
+    for tag in tags:
+      pipe.incr(self.prefix + 'tag:' + tag)
+    pipe.execute()
+
+  def clear(self):
+    keys = list(self.client.scan_iter(self.prefix + '*'))
+    if keys:
+      self.client.delete(*keys)
+
+
+#----------------------------------------------------------------------------#
+# Response cache.
+#----------------------------------------------------------------------------#
+
+class ResponseCache(object):
+  # Caches rendered GET pages keyed by path and query string. While rendering,
+  # a view declares the data it shows with tag() ('venues', 'venue:3', ...).
+  # Each cached page stores the version of its tags at render time, and write
+  # handlers call invalidate() with the tags they touched, so a page is only
+  # re-rendered once something it shows has changed (or its TTL runs out).
+
+  def __init__(self, app=None):
+    self.backend = None
+    self.hits = 0
+    self.misses = 0
+    self.invalidations = 0
+    self.lock = threading.Lock()
+    if app is not None:
+      self.init_app(app)
+
+  def init_app(self, app):
+    app.config.setdefault('CACHE_ENABLED', True)
+    app.config.setdefault('CACHE_TTL', 60)
+    app.config.setdefault('CACHE_MAX_ENTRIES', 1024)
+    app.config.setdefault('CACHE_REDIS_URL', None)
+
+    if app.config['CACHE_REDIS_URL']:
+      self.backend = RedisBackend(app.config['CACHE_REDIS_URL'])
+    else:
+      self.backend = LocalBackend(app.config['CACHE_MAX_ENTRIES'])
+
+  def count(self, metric):
+    with self.lock:
+      setattr(self, metric, getattr(self, metric) + 1)
+
+  def tag(self, *tags):
+    # Records the current version of each tag. Tagging before the data is
+    # queried means a write racing the render leaves the stored version behind,
+    # so the page is rendered again on the next request.
+    if 'cache_tags' not in g:
+      return
+    tags = [t for t in tags if t not in g.cache_tags]
+    g.cache_tags.update(zip(tags, self.backend.versions(tags)))
+
+  def invalidate(self, *tags):
+    self.backend.bump(tags)
+    self.count('invalidations')
+
+  def stats(self):
+    lookups = self.hits + self.misses
+    return {"hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": float(self.hits) / lookups if lookups else 0.0}
+
+  def cached(self, f):
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+      # Pages carrying flashed messages are personal, never serve or store them.
+      if not current_app.config['CACHE_ENABLED'] or '_flashes' in session:
+        return f(*args, **kwargs)
+
+      key = 'page:' + request.full_path
+      entry = self.backend.get(key)
+      if entry is not None:
+        body, mimetype, tags, versions = entry
+        if self.backend.versions(tags) == versions:
+          self.count('hits')
+          response = make_response(body)
+          response.mimetype = mimetype
+          return response
+      self.count('misses')
+
+      g.cache_tags = {}
+      response = make_response(f(*args, **kwargs))
+      if response.status_code == 200 and not response.is_streamed:
+        tags = sorted(g.cache_tags)
+        versions = [g.cache_tags[t] for t in tags]
+        self.backend.set(key, (response.get_data(), response.mimetype, tags, versions),
+                         current_app.config['CACHE_TTL'])
+      return response
+
+    return wrapper
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,82 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+import dateutil.parser
+from sqlalchemy import and_, event, func, select
+from extensions import db
+from models import Venue, Artist, Show
+
+
+#----------------------------------------------------------------------------#
+# Upcoming show counters.
+#----------------------------------------------------------------------------#
+
+# venue.upcoming_shows_count and artist.upcoming_shows_count hold the number
+# of shows starting at or after the last counter update, so listing pages read
+# them instead of counting shows. Inserting or deleting a show adjusts them in
+# the same transaction. The venues and artists whose shows moved into the
+# past are recounted by expire_shows(), which the reconcile-counters command
+# runs periodically together with a full reconcile_counts().
+
+counted_tables = ((Venue.__table__, Show.venue_id), (Artist.__table__, Show.artist_id))
+
+
+def start_time_of(show):
+  # start_time is still the submitted string until the session is refreshed.
+  if isinstance(show.start_time, str):
+    return dateutil.parser.parse(show.start_time, ignoretz=True)
+  return show.start_time
+
+
+def adjust_counters(connection, show, delta):
+  if start_time_of(show) < datetime.now():
+    return
+  for table, show_key in counted_tables:
+    connection.execute(table.update()
+                       .where(table.c.id == getattr(show, show_key.key))
+                       .values(upcoming_shows_count=table.c.upcoming_shows_count + delta))
+
+
+@event.listens_for(Show, 'after_insert')
+def count_inserted_show(mapper, connection, show):
+  adjust_counters(connection, show, 1)
+
+
+@event.listens_for(Show, 'after_delete')
+def count_deleted_show(mapper, connection, show):
+  adjust_counters(connection, show, -1)
+
+
+def upcoming_count(table, show_key, now):
+  # Correlated count of the shows of each venue or artist starting at or after
+  # now, served by the (venue_id|artist_id, start_time) indexes.
+  return select([func.count(Show.id)])\
+              .where(show_key == table.c.id)\
+              .where(Show.start_time >= now)\
+              .as_scalar()
+
+
+def expire_shows(since, now=None):
+  # Recounts the venues and artists with shows that started in [since, now).
+  # Recounting rather than subtracting keeps shows created with a start_time
+  # already inside the window (never counted as upcoming) from pushing a
+  # counter below the true count. Returns the number of shows in the window.
+  now = now or datetime.now()
+  started = and_(Show.start_time >= since, Show.start_time < now)
+  for table, show_key in counted_tables:
+    db.session.execute(table.update()
+                       .where(table.c.id.in_(select([show_key]).where(started)))
+                       .values(upcoming_shows_count=upcoming_count(table, show_key, now)))
+  expired = db.session.query(func.count(Show.id)).filter(started).scalar()
+  db.session.commit()
+  return expired
+
+
+def reconcile_counts(now=None):
+  # Recomputes every counter from the show table, one UPDATE per table.
+  now = now or datetime.now()
+  for table, show_key in counted_tables:
+    db.session.execute(table.update().values(upcoming_shows_count=upcoming_count(table, show_key, now)))
+  db.session.commit()
@@ -0,0 +1,18 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
+
+
+#----------------------------------------------------------------------------#
+# Extensions.
+#----------------------------------------------------------------------------#
+
+# Created unbound and bound to the app by create_app(), so models, queries and
+# scripts can import them without building an app. Flask-SQLAlchemy creates
+# the engine on the first query, not when the app is set up.
+
+db = SQLAlchemy()
+migrate = Migrate()
@@ -0,0 +1,94 @@
+"""normalized genres
+
+Revision ID: 3d6f1a8b5c20
+Revises: 9c3e7b1d4a26
+Create Date: 2026-10-18 12:31:50.162774
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d6f1a8b5c20'
+down_revision = '9c3e7b1d4a26'
+branch_labels = None
+depends_on = None
+
+
+def split_genres(genres):
+    return [g.strip() for g in (genres or '').split(',') if g.strip()]
+
+
+def upgrade():
+    genre = op.create_table('genre',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    venue_genre = op.create_table('venue_genre',
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('genre_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['genre_id'], ['genre.id'], ),
+    sa.ForeignKeyConstraint(['venue_id'], ['venue.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('venue_id', 'genre_id')
+    )
+    op.create_index('ix_venue_genre_genre_id', 'venue_genre', ['genre_id', 'venue_id'], unique=False)
+    artist_genre = op.create_table('artist_genre',
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('genre_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['artist_id'], ['artist.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['genre_id'], ['genre.id'], ),
+    sa.PrimaryKeyConstraint('artist_id', 'genre_id')
+    )
+    op.create_index('ix_artist_genre_genre_id', 'artist_genre', ['genre_id', 'artist_id'], unique=False)
+
+    # Convert the comma-joined strings in bulk: read every row once, insert
+    # the distinct genres, then all association rows with one executemany each.
+    conn = op.get_bind()
+    venues = conn.execute(sa.text('SELECT id, genres FROM venue')).fetchall()
+    artists = conn.execute(sa.text('SELECT id, genres FROM artist')).fetchall()
+
+    names = {name for _, genres in venues + artists for name in split_genres(genres)}
+    if names:
+        op.bulk_insert(genre, [{'name': name} for name in sorted(names)])
+    genre_ids = dict((name, id) for id, name in conn.execute(sa.text('SELECT id, name FROM genre')))
+
+    venue_rows = [{'venue_id': id, 'genre_id': genre_ids[name]}
+                  for id, genres in venues for name in set(split_genres(genres))]
+    if venue_rows:
+        op.bulk_insert(venue_genre, venue_rows)
+    artist_rows = [{'artist_id': id, 'genre_id': genre_ids[name]}
+                   for id, genres in artists for name in set(split_genres(genres))]
+    if artist_rows:
+        op.bulk_insert(artist_genre, artist_rows)
+
+    op.drop_column('venue', 'genres')
+    op.drop_column('artist', 'genres')
+
+
+def downgrade():
+    op.add_column('artist', sa.Column('genres', sa.VARCHAR(length=120), autoincrement=False, nullable=True))
+    op.add_column('venue', sa.Column('genres', sa.VARCHAR(length=120), autoincrement=False, nullable=True))
+
+    conn = op.get_bind()
+    for table, key in (('venue', 'venue_id'), ('artist', 'artist_id')):
+        genres = {}
+        rows = conn.execute(sa.text(
+            'SELECT a.{key}, g.name FROM {table}_genre a JOIN genre g ON g.id = a.genre_id '
+            'ORDER BY g.name'.format(table=table, key=key)))
+        for id, name in rows:
+            genres.setdefault(id, []).append(name)
+        if genres:
+            conn.execute(sa.text('UPDATE {table} SET genres = :genres WHERE id = :id'.format(table=table)),
+                         [{'id': id, 'genres': ', '.join(names)} for id, names in genres.items()])
+
+    conn.execute(sa.text("UPDATE artist SET genres = '' WHERE genres IS NULL"))
+    op.alter_column('artist', 'genres', nullable=False)
+
+    op.drop_index('ix_artist_genre_genre_id', table_name='artist_genre')
+    op.drop_table('artist_genre')
+    op.drop_index('ix_venue_genre_genre_id', table_name='venue_genre')
+    op.drop_table('venue_genre')
+    op.drop_table('genre')
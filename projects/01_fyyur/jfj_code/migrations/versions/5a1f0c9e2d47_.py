@@ -0,0 +1,35 @@
+"""trigram indexes on venue and artist names
+
+Revision ID: 5a1f0c9e2d47
+Revises: c064c587f139
+Create Date: 2026-10-18 10:12:31.204118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a1f0c9e2d47'
+down_revision = 'c064c587f139'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GIN trigram indexes let PostgreSQL serve name ILIKE '%term%' searches
+    # without scanning the whole table.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_venue_name_trgm', 'venue', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_artist_name_trgm', 'artist', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_artist_name_trgm', table_name='artist')
+    op.drop_index('ix_venue_name_trgm', table_name='venue')
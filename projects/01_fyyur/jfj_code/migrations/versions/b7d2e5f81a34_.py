@@ -0,0 +1,32 @@
+"""upcoming show counters on venue and artist
+
+Revision ID: b7d2e5f81a34
+Revises: 3d6f1a8b5c20
+Create Date: 2026-10-18 13:20:12.447019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e5f81a34'
+down_revision = '3d6f1a8b5c20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('venue', sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('artist', sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill, `flask reconcile-counters` keeps them current from here on.
+    op.execute("UPDATE venue SET upcoming_shows_count = "
+               "(SELECT count(*) FROM show WHERE show.venue_id = venue.id AND show.start_time >= CURRENT_TIMESTAMP)")
+    op.execute("UPDATE artist SET upcoming_shows_count = "
+               "(SELECT count(*) FROM show WHERE show.artist_id = artist.id AND show.start_time >= CURRENT_TIMESTAMP)")
+
+
+def downgrade():
+    op.drop_column('artist', 'upcoming_shows_count')
+    op.drop_column('venue', 'upcoming_shows_count')
@@ -2,15 +2,25 @@
 # Imports
 #----------------------------------------------------------------------------#
 
-from app import db, Venue, Artist, Show
+from app import create_app
+from models import Venue, Artist, Show
+from queries import genres_by_name
+
+app = create_app()
+app.app_context().push()
 
 
 #----------------------------------------------------------------------------#
 # Populating the Database
 #----------------------------------------------------------------------------#
 
+all_genres = {g.name: g for g in genres_by_name(["Jazz", "Reggae", "Swing", "Classical", "Folk", "R&B", "Hip-Hop", "Rock n Roll"])}
+
+def genre_list(*names):
+	return [all_genres[name] for name in names]
+
 venue_1 = Venue(name="The Musical Hop",
-				genres= "Jazz, Reggae, Swing, Classical, Folk",
+				genres=genre_list("Jazz", "Reggae", "Swing", "Classical", "Folk"),
 				address="1015 Folsom Street",
 				city="San Francisco",
 				state="CA",
@@ -22,7 +32,7 @@ venue_1 = Venue(name="The Musical Hop",
 				image_link="https://images.unsplash.com/photo-1543900694-133f37abaaa5?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=400&q=60")
 
 venue_2 = Venue(name="The Dueling Pianos Bar",
-				genres="Classical, R&B, Hip-Hop",
+				genres=genre_list("Classical", "R&B", "Hip-Hop"),
 				address="335 Delancey Street",
 				city="New York",
 				state="NY",
@@ -33,7 +43,7 @@ venue_2 = Venue(name="The Dueling Pianos Bar",
 				image_link="https://images.unsplash.com/photo-1497032205916-ac775f0649ae?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=750&q=80")
 
 venue_3 = Venue(name="Park Square Live Music & Coffee",
-				genres="Rock n Roll, Jazz, Classical, Folk",
+				genres=genre_list("Rock n Roll", "Jazz", "Classical", "Folk"),
 				address="34 Whiskey Moore Ave",
 				city="San Francisco",
 				state="CA",
@@ -51,7 +61,7 @@ artist_1 = Artist(name="Guns N Petals",
 					city="San Francisco",
 					state="CA",
 					phone="326-123-5000",
-					genres="Rock n Roll",
+					genres=genre_list("Rock n Roll"),
 					image_link="https://images.unsplash.com/photo-1549213783-8284d0336c4f?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=300&q=80",
 					facebook_link="https://www.facebook.com/GunsNPetals",
 					website="https://www.gunsnpetalsband.com",
@@ -62,7 +72,7 @@ artist_2 = Artist(name="Matt Quevedo",
 					city="New York",
 					state="NY",
 					phone="300-400-5000",
-					genres="Jazz",
+					genres=genre_list("Jazz"),
 					image_link="https://images.unsplash.com/photo-1495223153807-b916f75de8c5?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=334&q=80",
 					facebook_link="https://www.facebook.com/mattquevedo923251523",
 					seeking_venue=False)
@@ -71,7 +81,7 @@ artist_3 = Artist(name="The Wild Sax Band",
 					city="San Francisco",
 					state="CA",
 					phone="432-325-5432",
-					genres="Jazz, Classical",
+					genres=genre_list("Jazz", "Classical"),
 					image_link="https://images.unsplash.com/photo-1558369981-f9ca78462e61?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=794&q=80",
 					seeking_venue=False)
 
@@ -0,0 +1,246 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+from itertools import groupby
+from sqlalchemy import and_, func, tuple_
+from sqlalchemy.dialects import postgresql
+from extensions import db
+from models import Venue, Artist, Show, Genre, venue_genre, artist_genre
+from search_index import NgramIndex
+
+
+#----------------------------------------------------------------------------#
+# Helpers.
+#----------------------------------------------------------------------------#
+
+def genres_by_name(names):
+  # Returns the Genre rows for the given names, creating the missing ones.
+  # Missing genres are inserted right away, skipping any a concurrent request
+  # inserted first, and read back, so neither a second call in the same
+  # session nor two requests adding the same genre can insert it twice.
+  names = set(names)
+  if not names:
+    return []
+  genres = Genre.query.filter(Genre.name.in_(names)).all()
+  missing = names - {g.name for g in genres}
+  if missing:
+    db.session.execute(insert_missing(Genre.__table__),
+                       [{"name": name} for name in sorted(missing)])
+    genres += Genre.query.filter(Genre.name.in_(missing)).all()
+  return genres
+
+
+def insert_missing(table):
+  # INSERT that skips rows conflicting with a unique constraint.
+  if db.engine.dialect.name == 'postgresql':
+    return postgresql.insert(table).on_conflict_do_nothing()
+  if db.engine.dialect.name == 'sqlite':
+    return table.insert().prefix_with('OR IGNORE')
+  return table.insert()
+
+
+def like_pattern(term):
+  # '%term%' with the LIKE wildcards in term escaped with a backslash, so '%'
+  # and '_' match themselves as they do in the in-process index.
+  term = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+  return '%' + term + '%'
+
+
+def genre_members(member_key, genre_key, genre):
+  # Ids of the venues or artists playing genre, read from the association
+  # table's (genre_id, member) index rather than by probing every member.
+  return db.session.query(member_key)\
+              .join(Genre, Genre.id == genre_key)\
+              .filter(Genre.name == genre)
+
+
+#----------------------------------------------------------------------------#
+# Venue directory.
+#----------------------------------------------------------------------------#
+
+def venue_directory(yield_per=None, genre=None):
+  # Builds the /venues listing: venues grouped by (city, state), each with its
+  # number of upcoming shows read from the counter column. With genre only
+  # venues playing that genre are listed. With yield_per the
+  # rows are read through a server-side cursor in batches of that size and the
+  # listing is returned as a generator of areas, each with a generator of
+  # venues, to be consumed in order (e.g. by a streamed template).
+  query = db.session.query(Venue.id, Venue.name, Venue.city, Venue.state, Venue.upcoming_shows_count)
+  if genre:
+    query = query.filter(Venue.id.in_(genre_members(venue_genre.c.venue_id, venue_genre.c.genre_id, genre)))
+  query = query.order_by(Venue.state, Venue.city, Venue.name)
+
+  if yield_per:
+    return venue_areas(query.yield_per(yield_per))
+  return [dict(area, venues=list(area["venues"])) for area in venue_areas(query.all())]
+
+
+def venue_areas(rows):
+  for (state, city), area_rows in groupby(rows, key=lambda r: (r[3], r[2])):
+    yield {"city": city,
+           "state": state,
+           "venues": ({"id": r[0],
+                       "name": r[1],
+                       "num_upcoming_shows": r[4]}
+                      for r in area_rows)
+          }
+
+
+#----------------------------------------------------------------------------#
+# Artists listing.
+#----------------------------------------------------------------------------#
+
+def artist_listing(yield_per=None, genre=None):
+  # Builds the /artists listing, optionally only the artists playing genre.
+  # With yield_per the rows are read through a server-side cursor in batches
+  # of that size and returned as a generator.
+  query = db.session.query(Artist.id, Artist.name).order_by(Artist.name, Artist.id)
+  if genre:
+    query = query.filter(Artist.id.in_(genre_members(artist_genre.c.artist_id, artist_genre.c.genre_id, genre)))
+
+  artists = ({"id": r[0], "name": r[1]}
+             for r in (query.yield_per(yield_per) if yield_per else query.all()))
+  return artists if yield_per else list(artists)
+
+
+#----------------------------------------------------------------------------#
+# Search.
+#----------------------------------------------------------------------------#
+
+search_indexes = {Venue: NgramIndex(Venue), Artist: NgramIndex(Artist)}
+
+
+def search(model, search_term, page=1, per_page=None, use_index=True):
+  # Case-insensitive partial match on the name of a venue or artist. Returns
+  # the total number of matches and, for the requested page, each match with
+  # its number of upcoming shows, in at most two queries.
+  #
+  # On PostgreSQL the ILIKE below is served by the trigram index on name. On
+  # SQLite paged searches resolve the matching ids from the in-process trigram
+  # index instead, so only the page itself is read from the database.
+  page = max(page, 1)
+  name_filter = model.name.ilike(like_pattern(search_term), escape='\\')
+  offset = (page - 1) * per_page if per_page else 0
+
+  if use_index and per_page and db.engine.dialect.name == 'sqlite':
+    ids = search_indexes[model].search(db.session, search_term)
+    count = len(ids)
+    name_filter = and_(model.id.in_(ids[offset:offset + per_page]), name_filter)
+    offset = 0
+  else:
+    count = db.session.query(func.count(model.id)).filter(name_filter).scalar()
+
+  query = db.session.query(model.id, model.name, model.upcoming_shows_count)\
+              .filter(name_filter)\
+              .order_by(model.name, model.id)
+  if per_page:
+    query = query.limit(per_page).offset(offset)
+
+  return {"count": count,
+          "data": [{"id": r[0],
+                    "name": r[1],
+                    "num_upcoming_shows": r[2]}
+                   for r in query.all()]
+          }
+
+
+def search_venues(search_term, page=1, per_page=None):
+  return search(Venue, search_term, page, per_page)
+
+
+def search_artists(search_term, page=1, per_page=None):
+  return search(Artist, search_term, page, per_page)
+
+
+#----------------------------------------------------------------------------#
+# Detail pages.
+#----------------------------------------------------------------------------#
+
+def detail(model, entity_id, show_key, other, other_key, prefix, now=None):
+  # Loads a venue or artist together with all of its shows (and the artist or
+  # venue playing them) in a single query ordered by start_time. The shows
+  # are split into past and upcoming against one captured timestamp.
+  # Returns (entity, past_shows, upcoming_shows), entity is None if not found.
+  now = now or datetime.now()
+
+  rows = db.session.query(model, other.id, other.name, other.image_link, Show.start_time)\
+              .outerjoin(Show, show_key == model.id)\
+              .outerjoin(other, other_key == other.id)\
+              .filter(model.id == entity_id)\
+              .order_by(Show.start_time)\
+              .all()
+
+  if not rows:
+    return None, [], []
+
+  past_shows = []
+  upcoming_shows = []
+  for r in rows:
+    if r[4] is None:
+      continue
+    show = {prefix + "_id": r[1],
+            prefix + "_name": r[2],
+            prefix + "_image_link": r[3],
+            "start_time": str(r[4])}
+    (past_shows if r[4] < now else upcoming_shows).append(show)
+
+  return rows[0][0], past_shows, upcoming_shows
+
+
+def venue_detail(venue_id, now=None):
+  return detail(Venue, venue_id, Show.venue_id, Artist, Show.artist_id, "artist", now)
+
+
+def artist_detail(artist_id, now=None):
+  return detail(Artist, artist_id, Show.artist_id, Venue, Show.venue_id, "venue", now)
+
+
+#----------------------------------------------------------------------------#
+# Shows listing.
+#----------------------------------------------------------------------------#
+
+def encode_cursor(start_time, show_id):
+  return '%s,%d' % (start_time.isoformat(), show_id)
+
+
+def decode_cursor(cursor):
+  # Raises ValueError for a malformed cursor.
+  start_time, show_id = cursor.split(',')
+  return datetime.fromisoformat(start_time), int(show_id)
+
+
+def shows_page(after=None, per_page=30, include_past=False, now=None):
+  # One page of the /shows listing ordered by (start_time, id). Pages are
+  # addressed by the (start_time, id) of the last show on the previous page,
+  # so every page is an index range scan no matter how deep it is.
+  # Returns (shows, cursor of the next page or None).
+  now = now or datetime.now()
+
+  query = db.session.query(Show.id, Show.start_time, Venue.id, Venue.name,
+                           Artist.id, Artist.name, Artist.image_link)\
+              .join(Venue, Show.venue_id == Venue.id)\
+              .join(Artist, Show.artist_id == Artist.id)
+  if not include_past:
+    query = query.filter(Show.start_time >= now)
+  if after is not None:
+    query = query.filter(tuple_(Show.start_time, Show.id) > tuple_(*after))
+
+  # One extra row tells whether there is a next page.
+  rows = query.order_by(Show.start_time, Show.id).limit(per_page + 1).all()
+
+  next_cursor = None
+  if len(rows) > per_page:
+    rows = rows[:per_page]
+    next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+
+  shows = [{"venue_id": r[2],
+            "venue_name": r[3],
+            "artist_id": r[4],
+            "artist_name": r[5],
+            "artist_image_link": r[6],
+            "start_time": str(r[1])}
+           for r in rows]
+
+  return shows, next_cursor
@@ -0,0 +1,107 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import threading
+from collections import defaultdict
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+
+#----------------------------------------------------------------------------#
+# In-process trigram index.
+#----------------------------------------------------------------------------#
+
+# On PostgreSQL name searches are served by the pg_trgm GIN indexes created in
+# migration 5a1f0c9e2d47. SQLite has no equivalent, so when running on it (tests,
+# benchmarks) the search code uses this in-process index instead. It is built
+# lazily on the first search and kept up to date from mapper events, so it only
+# sees ORM writes made by this process; call reset() after bulk loads. The
+# changes a session flushes are held until it commits and dropped if it rolls
+# back, so the index never lists rows that were not committed.
+
+def trigrams(text):
+  text = text.lower()
+  return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NgramIndex(object):
+
+  def __init__(self, model):
+    self.model = model
+    self.names = None
+    self.postings = defaultdict(set)
+    self.lock = threading.Lock()
+
+    event.listen(model, 'after_insert', self._on_write)
+    event.listen(model, 'after_update', self._on_write)
+    event.listen(model, 'after_delete', self._on_delete)
+    event.listen(Session, 'after_commit', self._on_commit)
+    event.listen(Session, 'after_rollback', self._on_rollback)
+
+  def reset(self):
+    with self.lock:
+      self.names = None
+      self.postings = defaultdict(set)
+
+  def _build(self, session):
+    self.names = {}
+    self.postings = defaultdict(set)
+    for id, name in session.query(self.model.id, self.model.name):
+      self._add(id, name)
+
+  def _add(self, id, name):
+    self.names[id] = name
+    for gram in trigrams(name):
+      self.postings[gram].add(id)
+
+  def _remove(self, id):
+    name = self.names.pop(id, None)
+    if name is not None:
+      for gram in trigrams(name):
+        self.postings[gram].discard(id)
+
+  def _pending(self, target):
+    # (id, name or None if deleted) of the rows flushed by target's session
+    return object_session(target).info.setdefault(self, [])
+
+  def _on_write(self, mapper, connection, target):
+    self._pending(target).append((target.id, target.name))
+
+  def _on_delete(self, mapper, connection, target):
+    self._pending(target).append((target.id, None))
+
+  def _on_commit(self, session):
+    changes = session.info.pop(self, None)
+    if not changes:
+      return
+    with self.lock:
+      if self.names is not None:
+        for id, name in changes:
+          self._remove(id)
+          if name is not None:
+            self._add(id, name)
+
+  def _on_rollback(self, session):
+    session.info.pop(self, None)
+
+  def search(self, session, search_term):
+    # Returns the ids of all rows whose name contains search_term
+    # (case-insensitive), ordered by (name, id).
+    term = search_term.lower()
+
+    with self.lock:
+      if self.names is None:
+        self._build(session)
+
+      grams = trigrams(term)
+      if grams:
+        candidates = set.intersection(*[self.postings.get(g, set()) for g in grams])
+      else:
+        # Terms shorter than a trigram can't be looked up, check every name.
+        candidates = self.names.keys()
+
+      matches = [(self.names[id], id) for id in candidates if term in self.names[id].lower()]
+
+    matches.sort()
+    return [id for name, id in matches]
@@ -0,0 +1,92 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import sys
+from flask import Blueprint, current_app, render_template, request, flash, url_for, abort
+from extensions import db
+from cache import response_cache
+from forms import ShowForm
+from models import Show
+from streaming import stream_template
+import queries
+
+
+bp = Blueprint('shows', __name__)
+
+
+#----------------------------------------------------------------------------#
+# Controllers.
+#----------------------------------------------------------------------------#
+
+#  Shows
+#  ----------------------------------------------------------------
+
+@bp.route('/shows')
+@response_cache.cached
+def shows():
+  # displays list of shows at /shows
+  # Done: replace with real venues data.
+
+  try:
+    after = request.args.get('after')
+    after = queries.decode_cursor(after) if after else None
+  except ValueError:
+    abort(400)
+
+  per_page = min(request.args.get('per_page', current_app.config['SHOWS_PER_PAGE'], type=int),
+                 current_app.config['SHOWS_PER_PAGE_MAX'])
+  include_past = request.args.get('include_past', 0, type=int) == 1
+  response_cache.tag('shows')
+
+  data, next_cursor = queries.shows_page(after, max(per_page, 1), include_past)
+
+  next_url = None
+  if next_cursor:
+    next_url = url_for('shows.shows', after=next_cursor, per_page=per_page,
+                       include_past=int(include_past))
+
+  if current_app.config['STREAM_LISTINGS']:
+    return stream_template('pages/shows.html', shows=data, next_url=next_url)
+
+  return render_template('pages/shows.html', shows=data, next_url=next_url)
+
+@bp.route('/shows/create')
+def create_shows():
+  # renders form. do not touch.
+  form = ShowForm()
+  return render_template('forms/new_show.html', form=form)
+
+@bp.route('/shows/create', methods=['POST'])
+def create_show_submission():
+  # called to create new shows in the db, upon submitting new show listing form
+  # Done: insert form data as a new Show record in the db, instead
+  error = False
+
+  try:
+    show_request = request.form
+    show = Show(artist_id=show_request['artist_id'],
+                venue_id=show_request['venue_id'],
+                start_time=show_request['start_time']
+              )
+    db.session.add(show)
+    db.session.commit()
+
+  except:
+    error = True
+    db.session.rollback()
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+
+  if error:
+    # Done: on unsuccessful db insert, flash an error instead.
+    flash('An error occurred. Show could not be listed.')
+  else:
+    # on successful db insert, flash success
+    response_cache.invalidate('shows',
+                              'venue:%d' % int(request.form['venue_id']),
+                              'artist:%d' % int(request.form['artist_id']))
+    flash('Show was successfully listed!')
+
+  return render_template('pages/home.html')
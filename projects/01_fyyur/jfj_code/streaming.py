@@ -0,0 +1,20 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from flask import Response, current_app, stream_with_context
+
+
+#----------------------------------------------------------------------------#
+# Streaming.
+#----------------------------------------------------------------------------#
+
+def stream_template(template_name, **context):
+  # Like render_template, but sends the page to the client while it is being
+  # rendered. Context values can be generators, they are consumed as the
+  # template reaches them, so a listing never has to be held in memory.
+  app = current_app._get_current_object()
+  app.update_template_context(context)
+  stream = app.jinja_env.get_template(template_name).stream(context)
+  stream.enable_buffering(app.config['STREAM_BUFFER_SIZE'])
+  return Response(stream_with_context(stream))
@@ -0,0 +1,232 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import sys
+from flask import Blueprint, current_app, render_template, request, flash, redirect, url_for, jsonify, abort
+from extensions import db
+from cache import response_cache
+from forms import VenueForm
+from models import Venue
+from streaming import stream_template
+import queries
+
+
+bp = Blueprint('venues', __name__)
+
+
+#----------------------------------------------------------------------------#
+# Controllers.
+#----------------------------------------------------------------------------#
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@bp.route('/venues')
+@response_cache.cached
+def venues():
+  # Done: replace with real venues data.
+  #       num_shows should be aggregated based on number of upcoming shows per venue.
+
+  genre = request.args.get('genre')
+  response_cache.tag('venues')
+
+  if current_app.config['STREAM_LISTINGS']:
+    data = queries.venue_directory(yield_per=current_app.config['STREAM_YIELD_PER'], genre=genre)
+    return stream_template('pages/venues.html', areas=data)
+
+  data = queries.venue_directory(genre=genre)
+
+  return render_template('pages/venues.html', areas=data);
+
+@bp.route('/venues/search', methods=['POST'])
+def search_venues():
+  # Done: implement search on artists with partial string search. Ensure it is case-insensitive.
+  # seach for Hop should return "The Musical Hop".
+  # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
+
+  search_string = request.form.get('search_term','')
+
+  response = queries.search_venues(search_string,
+                                   page=request.args.get('page', 1, type=int),
+                                   per_page=current_app.config['SEARCH_RESULTS_PER_PAGE'])
+
+  return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
+
+@bp.route('/venues/<int:venue_id>')
+@response_cache.cached
+def show_venue(venue_id):
+  # shows the venue page with the given venue_id
+  # Done: replace with real venue data from the venues table, using venue_id
+
+  response_cache.tag('venue:%d' % venue_id)
+  venue, past_shows, upcoming_shows = queries.venue_detail(venue_id)
+  if venue is None:
+    abort(404)
+  response_cache.tag(*['artist:%d' % s["artist_id"] for s in past_shows + upcoming_shows])
+
+  data={
+      "id": venue_id,
+      "name": venue.name,
+      "genres": [g.name for g in venue.genres],
+      "address": venue.address,
+      "city": venue.city,
+      "state": venue.state,
+      "phone": venue.phone,
+      "website": venue.website,
+      "facebook_link": venue.facebook_link,
+      "seeking_talent": venue.seeking_talent,
+      "seeking_description": venue.seeking_description,
+      "image_link": venue.image_link,
+      "past_shows": past_shows,
+      "upcoming_shows": upcoming_shows,
+      "past_shows_count": len(past_shows),
+      "upcoming_shows_count": len(upcoming_shows),
+    }
+
+
+  return render_template('pages/show_venue.html', venue=data)
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/create', methods=['GET'])
+def create_venue_form():
+  form = VenueForm()
+  return render_template('forms/new_venue.html', form=form)
+
+@bp.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+  # Done: insert form data as a new Venue record in the db, instead
+  # Done: modify data to be the data object returned from db insertion
+
+  error = False
+
+  try:
+    venue_request = request.form
+    venue = Venue(name=venue_request['name'],
+                genres=queries.genres_by_name(venue_request.getlist('genres')),
+                address=venue_request['address'],
+                city=venue_request['city'],
+                state=venue_request['state'],
+                phone=venue_request['phone'],
+                # website=venue_request['website'],
+                facebook_link=venue_request['facebook_link'],
+                # seeking_talent=venue_request['seeking_talent'],
+                # seeking_description=venue_request['seeking_description'],
+                image_link='https://dummyimage.com/600x400/000/fff.jpg&text='+venue_request['name']
+      )
+    db.session.add(venue)
+    db.session.commit()
+
+  except:
+    error = True
+    db.session.rollback()
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+
+  if error:
+    # Done: on unsuccessful db insert, flash an error instead.
+    flash('An error occurred. Venue ' + request.form['name'] + ' could not be listed.')
+  else:
+    # on successful db insert, flash success
+    response_cache.invalidate('venues')
+    flash('Venue ' + request.form['name'] + ' was successfully listed!')
+
+  return render_template('pages/home.html')
+
+@bp.route('/venues/<venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+  # Done: Complete this endpoint for taking a venue_id, and using
+  # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
+
+  success = True
+  try:
+    venue = Venue.query.get(venue_id)
+    db.session.delete(venue)
+    db.session.commit()
+  except:
+    success = False
+    db.session.rollback()
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+
+  if success:
+    # artist pages listing shows at this venue are tagged with it too
+    response_cache.invalidate('venues', 'shows', 'venue:%s' % venue_id)
+
+  return jsonify({'success':success})
+
+
+  # Done: BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
+  # clicking that button delete it from the db then redirect the user to the homepage
+
+#  Update Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+
+  venue_query = Venue.query.filter_by(id=venue_id).first_or_404()
+
+  venue={
+    "id": venue_query.id,
+    "name": venue_query.name,
+    "genres": [g.name for g in venue_query.genres],
+    "address": venue_query.address,
+    "city": venue_query.city,
+    "state": venue_query.state,
+    "phone": venue_query.phone,
+    "website": venue_query.website,
+    "facebook_link": venue_query.facebook_link,
+    "seeking_talent": venue_query.seeking_talent,
+    "seeking_description": venue_query.seeking_description,
+    "image_link": venue_query.image_link
+  }
+
+  # Done: populate form with fields from artist with ID <venue_id>
+  form = VenueForm(data=venue)
+  
+  return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+  # Done: take values from the form submitted, and update existing
+  # venue record with ID <venue_id> using the new attributes
+
+  venue = Venue.query.filter_by(id=venue_id).first_or_404()
+  error = False
+
+  try:
+    form = VenueForm(obj=venue)
+    if form.validate():
+      genres = request.form.getlist('genres')
+      # genres is a relationship, populate_obj can't assign the names to it
+      del form.genres
+      form.populate_obj(venue)
+      venue.genres = queries.genres_by_name(genres)
+      db.session.add(venue)
+      db.session.commit()
+    else:
+      print(form.errors)
+      error = True
+
+  except:
+    error = True
+    db.session.rollback()
+    print(sys.exc_info())
+
+  finally:
+    db.session.close()
+
+  if error:
+    # Done: on unsuccessful db insert, flash an error instead.
+    flash('An error occurred. Venue ' + request.form['name'] + ' could not be updated.')
+  else:
+    # on successful db insert, flash success
+    response_cache.invalidate('venues', 'shows', 'venue:%d' % venue_id)
+    flash('Venue ' + request.form['name'] + ' was successfully updated!')
+
+  return redirect(url_for('venues.show_venue', venue_id=venue_id))
@@ -0,0 +1,192 @@
+'''
+Benchmarks for the trivia backend, against a throwaway SQLite database
+unless TRIVIA_BENCHMARK_DATABASE_URL points at a scratch database.
+Run from the backend directory, i.e.
+
+    python benchmark.py pages --questions 100000
+'''
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from flaskr import create_app, question_pages, question_search, quiz_sessions
+from models import db, Question, Category
+
+database_path = os.environ.get('TRIVIA_BENCHMARK_DATABASE_URL',
+                               'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'trivia_benchmark.db'))
+
+
+# a synthetic vocabulary with a long tail, so some words are rare and some common
+vocabulary = ['%s%s' % (a, b) for a in ('ka', 'lo', 'mi', 'nu', 'pe', 'ra', 'si', 'to', 'vu', 'ze')
+              for b in ('ber', 'cant', 'dil', 'fen', 'gos', 'hul', 'jor', 'kes', 'lam', 'mon',
+                        'nix', 'pra', 'quo', 'rit', 'sul', 'tev', 'ush', 'vol', 'wek', 'yor')]
+weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+
+
+def synthetic_question(i):
+  return ' '.join(random.choices(vocabulary, weights, k=random.randint(5, 15))) + '?'
+
+
+def seed(num_questions, num_categories=6, text=lambda i: 'Question %d?' % i):
+  db.drop_all()
+  db.create_all()
+  db.session.bulk_insert_mappings(Category, [{'id': i, 'type': 'Category %d' % i}
+                                             for i in range(1, num_categories + 1)])
+  db.session.bulk_insert_mappings(Question, [{
+    'question': text(i),
+    'answer': 'Answer %d' % i,
+    'category': random.randint(1, num_categories),
+    'difficulty': random.randint(1, 5)
+  } for i in range(num_questions)])
+  db.session.commit()
+  # bulk inserts bypass the mapper events that keep the paginator and search index current
+  question_pages.reset()
+  question_search.reset()
+
+
+def measure(client, url, repeat):
+  timings = []
+  for _ in range(repeat):
+    start = time.perf_counter()
+    response = client.get(url)
+    timings.append((time.perf_counter() - start) * 1e3)
+    assert response.status_code == 200, (url, response.status_code)
+  return statistics.median(timings)
+
+
+'''
+bench_pages(args)
+  median latency of GET /questions?page=<n> from page 1 to page 10,000,
+  against the same page read with OFFSET
+'''
+def bench_pages(app, args):
+  seed(args.questions)
+  client = app.test_client()
+  client.get('/questions')
+
+  print('%8s %12s %12s' % ('page', 'keyset ms', 'offset ms'))
+  for page in args.pages:
+    if (page - 1) * 10 >= args.questions:
+      continue
+    keyset = measure(client, '/questions?page=%d' % page, args.repeat)
+
+    def offset_page():
+      Question.query.order_by(Question.id).offset((page - 1) * 10).limit(10).all()
+      Question.query.count()
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+      offset_page()
+    offset = (time.perf_counter() - start) / args.repeat * 1e3
+
+    print('%8d %12.2f %12.2f' % (page, keyset, offset))
+
+
+'''
+bench_quiz(args)
+  median latency and request size of POST /quizzes with a growing number of
+  questions asked, sent as previous_questions or kept in a quiz session,
+  against picking the question with ORDER BY random()
+'''
+def bench_quiz(app, args):
+  seed(args.questions)
+  client = app.test_client()
+  ids = [id for (id,) in db.session.query(Question.id).filter(Question.category == 1)]
+
+  def median_post(body):
+    timings = []
+    for _ in range(args.repeat):
+      start = time.perf_counter()
+      response = client.post('/quizzes', json=body)
+      timings.append((time.perf_counter() - start) * 1e3)
+      assert response.status_code == 200
+    return statistics.median(timings)
+
+  print('%10s %14s %14s %12s %12s %16s' % ('asked', 'previous ms', 'previous bytes',
+                                          'session ms', 'session bytes', 'order by random ms'))
+  for num_previous in args.previous:
+    previous = random.sample(ids, min(num_previous, len(ids)))
+    previous_body = {'previous_questions': previous, 'quiz_category': {'type': 'Category 1', 'id': 1}}
+    previous_ms = median_post(previous_body)
+
+    # a session that already asked the same questions; the draws made while
+    # measuring add at most repeat more
+    session_body = {'quiz_session': quiz_sessions.start(1, previous).id}
+    session_ms = median_post(session_body)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+      Question.query.filter(Question.category == 1, ~Question.id.in_(previous))\
+        .order_by(db.func.random()).first()
+    random_order = (time.perf_counter() - start) / args.repeat * 1e3
+
+    print('%10d %14.2f %14d %12.2f %12d %16.2f' % (
+      num_previous, previous_ms, len(json.dumps(previous_body)),
+      session_ms, len(json.dumps(session_body)), random_order))
+
+
+'''
+bench_search(args)
+  median latency of a search through POST /questions (full text index on
+  PostgreSQL, the in-memory inverted index otherwise) against LIKE '%term%'
+  over a synthetic corpus
+'''
+def bench_search(app, args):
+  seed(args.questions, text=synthetic_question)
+  client = app.test_client()
+
+  start = time.perf_counter()
+  client.post('/questions', json={'searchTerm': vocabulary[0]})
+  print('first search (builds the in-memory index if used) %.0f ms' % ((time.perf_counter() - start) * 1e3))
+
+  terms = [vocabulary[0], vocabulary[-1], vocabulary[len(vocabulary) // 2][:3],
+           '%s %s' % (vocabulary[1], vocabulary[-2])]
+  print('%16s %10s %12s %12s' % ('term', 'matches', 'search ms', 'like ms'))
+  for term in terms:
+    timings = []
+    for _ in range(args.repeat):
+      start = time.perf_counter()
+      response = client.post('/questions', json={'searchTerm': term})
+      timings.append((time.perf_counter() - start) * 1e3)
+    total = response.get_json()['total_questions']
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+      like = Question.query.filter(Question.question.ilike('%' + term + '%'))
+      like.order_by(Question.id).limit(10).all()
+      like.count()
+    like_ms = (time.perf_counter() - start) / args.repeat * 1e3
+
+    print('%16s %10d %12.2f %12.2f' % (term, total, statistics.median(timings), like_ms))
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description=__doc__,
+                                   formatter_class=argparse.RawDescriptionHelpFormatter)
+  subparsers = parser.add_subparsers(dest='benchmark')
+  subparsers.required = True
+
+  pages_parser = subparsers.add_parser('pages', help='/questions pages, keyset vs offset')
+  pages_parser.add_argument('--questions', type=int, default=100000)
+  pages_parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100, 1000, 10000])
+  pages_parser.add_argument('--repeat', type=int, default=20)
+  pages_parser.set_defaults(func=bench_pages)
+
+  quiz_parser = subparsers.add_parser('quiz', help='/quizzes, previous_questions vs sessions vs ORDER BY random()')
+  quiz_parser.add_argument('--questions', type=int, default=300000)
+  quiz_parser.add_argument('--previous', type=int, nargs='+', default=[0, 20, 500, 5000])
+  quiz_parser.add_argument('--repeat', type=int, default=20)
+  quiz_parser.set_defaults(func=bench_quiz)
+
+  search_parser = subparsers.add_parser('search', help='question search, index vs LIKE')
+  search_parser.add_argument('--questions', type=int, default=500000)
+  search_parser.add_argument('--repeat', type=int, default=10)
+  search_parser.set_defaults(func=bench_search)
+
+  args = parser.parse_args()
+  app = create_app({'SQLALCHEMY_DATABASE_URI': database_path})
+  with app.app_context():
+    args.func(app, args)
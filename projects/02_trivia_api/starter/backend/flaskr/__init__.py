@@ -1,31 +1,86 @@
-import os
+import click
 from flask import Flask, request, abort, jsonify
-from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-import random
+from sqlalchemy import event
 
-from models import setup_db, Question, Category
+from models import setup_db, db, Question, Category, database_path
+from .pagination import KeysetPaginator, CursorError
+from .search import QuestionSearch
+from .loader import load_questions, read_csv, read_ndjson
+from .quiz import AskedIds, QuizSession, QuizSessions
 
 QUESTIONS_PER_PAGE = 10
 
+question_pages = KeysetPaginator(Question, group_by=Question.category)
+question_search = QuestionSearch(Question)
+quiz_sessions = QuizSessions()
+
+'''
+categories_by_id()
+  the {id: type} of every category, read once and kept until a category is written through the ORM
+'''
+category_types = {}
+
+def categories_by_id():
+  if 'all' not in category_types:
+    category_types['all'] = {category.id: category.type for category in Category.query.order_by(Category.id)}
+  return category_types['all']
+
+@event.listens_for(Category, 'after_insert')
+@event.listens_for(Category, 'after_update')
+@event.listens_for(Category, 'after_delete')
+def forget_categories(mapper, connection, target):
+  category_types.clear()
+
+'''
+paginate_questions(query, group=None)
+  the page of query asked for with ?page=<n> or ?cursor=<token> (and ?per_page=<n>, up to 100)
+  responds with 400 for a malformed cursor and 404 past the last page
+'''
+def paginate_questions(query, group=None):
+  per_page = min(max(request.args.get('per_page', QUESTIONS_PER_PAGE, type=int), 1), 100)
+  try:
+    result = question_pages.page(query,
+                                 page=request.args.get('page', 1, type=int),
+                                 cursor=request.args.get('cursor'),
+                                 per_page=per_page,
+                                 group=group)
+  except CursorError:
+    abort(400)
+  if not result['rows'] and (result['page'] > 1 or 'cursor' in request.args):
+    abort(404)
+  return result
+
 def create_app(test_config=None):
   # create and configure the app
   app = Flask(__name__)
-  setup_db(app)
+  setup_db(app, (test_config or {}).get('SQLALCHEMY_DATABASE_URI', database_path))
   
   '''
   @TODO: Set up CORS. Allow '*' for origins. Delete the sample route after completing the TODOs
   '''
+  CORS(app, resources={r"/*": {"origins": "*"}})
 
   '''
   @TODO: Use the after_request decorator to set Access-Control-Allow
   '''
+  @app.after_request
+  def after_request(response):
+    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,true')
+    response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
+    return response
 
   '''
   @TODO: 
   Create an endpoint to handle GET requests 
   for all available categories.
   '''
+  @app.route('/categories')
+  def get_categories():
+    return jsonify({
+      'success': True,
+      'categories': categories_by_id()
+    })
 
 
   '''
@@ -40,6 +95,19 @@ def create_app(test_config=None):
   ten questions per page and pagination at the bottom of the screen for three pages.
   Clicking on the page numbers should update the questions. 
   '''
+  @app.route('/questions')
+  def get_questions():
+    result = paginate_questions(Question.query)
+    return jsonify({
+      'success': True,
+      'questions': [question.format() for question in result['rows']],
+      'total_questions': result['total'],
+      'page': result['page'],
+      'next_cursor': result['next_cursor'],
+      'prev_cursor': result['prev_cursor'],
+      'categories': categories_by_id(),
+      'current_category': None
+    })
 
   '''
   @TODO: 
@@ -48,6 +116,18 @@ def create_app(test_config=None):
   TEST: When you click the trash icon next to a question, the question will be removed.
   This removal will persist in the database and when you refresh the page. 
   '''
+  @app.route('/questions/<int:question_id>', methods=['DELETE'])
+  def delete_question(question_id):
+    question = Question.query.get(question_id)
+    if question is None:
+      abort(404)
+
+    question.delete()
+
+    return jsonify({
+      'success': True,
+      'deleted': question_id
+    })
 
   '''
   @TODO: 
@@ -59,6 +139,38 @@ def create_app(test_config=None):
   the form will clear and the question will appear at the end of the last page
   of the questions list in the "List" tab.  
   '''
+  @app.route('/questions', methods=['POST'])
+  def create_question():
+    body = request.get_json(silent=True) or {}
+    if 'searchTerm' in body:
+      return search_questions(body)
+
+    if not body.get('question') or not body.get('answer') \
+        or body.get('category') is None or body.get('difficulty') is None:
+      abort(400)
+
+    try:
+      category = int(body['category'])
+      difficulty = int(body['difficulty'])
+    except (TypeError, ValueError):
+      abort(400)
+    if category not in categories_by_id():
+      abort(422)
+
+    try:
+      question = Question(question=body['question'],
+                          answer=body['answer'],
+                          category=category,
+                          difficulty=difficulty)
+      question.insert()
+    except Exception:
+      db.session.rollback()
+      abort(422)
+
+    return jsonify({
+      'success': True,
+      'created': question.id
+    })
 
   '''
   @TODO: 
@@ -70,6 +182,26 @@ def create_app(test_config=None):
   only question that include that string within their question. 
   Try using the word "title" to start. 
   '''
+  def search_questions(body):
+    search_term = body['searchTerm']
+    if not isinstance(search_term, str):
+      abort(400)
+    try:
+      page = int(body.get('page', request.args.get('page', 1)))
+      per_page = min(max(int(body.get('per_page', request.args.get('per_page', QUESTIONS_PER_PAGE))), 1), 100)
+    except (TypeError, ValueError):
+      abort(400)
+    if page < 1:
+      abort(400)
+
+    questions, total = question_search.search(Question.query, search_term, page, per_page)
+    return jsonify({
+      'success': True,
+      'questions': [question.format() for question in questions],
+      'total_questions': total,
+      'page': page,
+      'current_category': None
+    })
 
   '''
   @TODO: 
@@ -79,6 +211,22 @@ def create_app(test_config=None):
   categories in the left column will cause only questions of that 
   category to be shown. 
   '''
+  @app.route('/categories/<int:category_id>/questions')
+  def get_category_questions(category_id):
+    categories = categories_by_id()
+    if category_id not in categories:
+      abort(404)
+
+    result = paginate_questions(Question.query.filter(Question.category == category_id), group=category_id)
+    return jsonify({
+      'success': True,
+      'questions': [question.format() for question in result['rows']],
+      'total_questions': result['total'],
+      'page': result['page'],
+      'next_cursor': result['next_cursor'],
+      'prev_cursor': result['prev_cursor'],
+      'current_category': categories[category_id]
+    })
 
 
   '''
@@ -92,12 +240,128 @@ def create_app(test_config=None):
   one question at a time is displayed, the user is allowed to answer
   and shown whether they were correct or not. 
   '''
+  @app.route('/quizzes', methods=['POST'])
+  def play_quiz():
+    body = request.get_json(silent=True) or {}
+    session_id = body.get('quiz_session')
+    start_session = body.get('start_session', False)
+    previous = body.get('previous_questions', [])
+    quiz_category = body.get('quiz_category') or {}
+    if not isinstance(previous, list) or not isinstance(quiz_category, dict) \
+        or not isinstance(session_id, (str, type(None))) or not isinstance(start_session, bool):
+      abort(400)
+    try:
+      previous = [int(id) for id in previous]
+      category = int(quiz_category.get('id', 0))
+    except (TypeError, ValueError):
+      abort(400)
+
+    # a session is only started when the client asks for one (and will send
+    # its id back on the next turns); other clients resend previous_questions
+    # and are answered without one
+    if session_id is not None:
+      session = quiz_sessions.get(session_id)
+      if session is None:
+        abort(404)
+    elif start_session:
+      session = quiz_sessions.start(category)
+    else:
+      session = QuizSession(None, category, AskedIds())
+
+    with session.lock:
+      for id in previous:
+        session.asked.add(id)
+
+      # a random id from the in-memory ids of the category (0 is all of them),
+      # then a single lookup by primary key; if the question was deleted by
+      # another process since the ids were loaded, reload them and retry
+      question = None
+      for _ in range(3):
+        question_id = question_pages.random_id(db.session, session.category or None, session.asked)
+        if question_id is None:
+          break
+        session.asked.add(question_id)
+        question = Question.query.get(question_id)
+        if question is not None:
+          break
+        question_pages.invalidate(session.category or None)
+
+    return jsonify({
+      'success': True,
+      'question': question.format() if question else None,
+      'quiz_session': session.id
+    })
+
+  '''
+  flask load-questions FILE
+    bulk loads questions from NDJSON or CSV (see flaskr/loader.py), FILE may be - for stdin
+  '''
+  @app.cli.command('load-questions')
+  @click.argument('file', type=click.File('r'))
+  @click.option('--format', 'file_format', type=click.Choice(['ndjson', 'csv']),
+                help='defaults to the file extension, ndjson for stdin')
+  @click.option('--batch-size', default=500, show_default=True)
+  @click.option('--create-categories/--no-create-categories', default=True, show_default=True)
+  def load_questions_command(file, file_format, batch_size, create_categories):
+    file_format = file_format or ('csv' if file.name.lower().endswith('.csv') else 'ndjson')
+    rows = read_csv(file) if file_format == 'csv' else read_ndjson(file)
+    report = load_questions(rows, batch_size, create_categories)
+
+    # the rows were written with executemany, bypassing the mapper events
+    # that keep these current
+    question_pages.reset()
+    question_search.reset()
+    category_types.clear()
+
+    for number, error in report['errors']:
+      click.echo('line %d: %s' % (number, error), err=True)
+    click.echo('%(inserted)d inserted, %(updated)d updated, %(skipped)d skipped '
+               'in %(seconds).2fs (%(rows_per_second).0f rows/s)' % report)
 
   '''
   @TODO: 
   Create error handlers for all expected errors 
   including 404 and 422. 
   '''
+  @app.errorhandler(400)
+  def bad_request(error):
+    return jsonify({
+      'success': False,
+      'error': 400,
+      'message': 'bad request'
+    }), 400
+
+  @app.errorhandler(404)
+  def not_found(error):
+    return jsonify({
+      'success': False,
+      'error': 404,
+      'message': 'resource not found'
+    }), 404
+
+  @app.errorhandler(405)
+  def method_not_allowed(error):
+    return jsonify({
+      'success': False,
+      'error': 405,
+      'message': 'method not allowed'
+    }), 405
+
+  @app.errorhandler(422)
+  def unprocessable(error):
+    return jsonify({
+      'success': False,
+      'error': 422,
+      'message': 'unprocessable'
+    }), 422
+
+  @app.errorhandler(500)
+  def server_error(error):
+    return jsonify({
+      'success': False,
+      'error': 500,
+      'message': 'internal server error'
+    }), 500
   
   return app
 
@@ -0,0 +1,167 @@
+import csv
+import json
+import time
+from sqlalchemy import bindparam
+
+from models import db, Question, Category
+
+'''
+Bulk question loader (flask load-questions)
+
+Reads questions from NDJSON (one object per line) or CSV (with a header row),
+with the fields question, answer, category and difficulty, and optionally id.
+The category is a category id or type; unknown types are created. Rows are
+written in batches, one executemany for the new questions and one for the
+existing ones per batch, and a single commit. Loading is idempotent: a row
+replaces the question with the same id if it has one, otherwise the question
+with the same text.
+'''
+
+class LoadError(ValueError):
+  pass
+
+
+def read_ndjson(file):
+  for number, line in enumerate(file, 1):
+    if line.strip():
+      try:
+        yield number, json.loads(line)
+      except ValueError as e:
+        yield number, LoadError('invalid json: %s' % e)
+
+
+def read_csv(file):
+  # the header is line 1
+  for number, row in enumerate(csv.DictReader(file), 2):
+    yield number, row
+
+
+class CategoryMap(object):
+  # category ids by id and by lower case type, read once per load
+
+  def __init__(self, create):
+    self.create = create
+    self.ids = {}
+    for category in Category.query:
+      self.ids[category.id] = category.id
+      self.ids[(category.type or '').strip().lower()] = category.id
+
+  def resolve(self, value):
+    if isinstance(value, int) or (isinstance(value, str) and value.strip().isdigit()):
+      key = int(value)
+    elif isinstance(value, str) and value.strip():
+      key = value.strip().lower()
+    else:
+      raise LoadError('missing category')
+
+    if key not in self.ids:
+      if isinstance(key, int) or not self.create:
+        raise LoadError('unknown category %r' % value)
+      category = Category(value.strip())
+      db.session.add(category)
+      db.session.flush()
+      self.ids[key] = self.ids[category.id] = category.id
+    return self.ids[key]
+
+
+def question_values(row, categories):
+  if not isinstance(row, dict):
+    raise LoadError('expected an object')
+  question = (row.get('question') or '').strip()
+  answer = (row.get('answer') or '').strip()
+  if not question or not answer:
+    raise LoadError('question and answer are required')
+  try:
+    difficulty = int(row.get('difficulty'))
+    id = int(row['id']) if row.get('id') not in (None, '') else None
+  except (TypeError, ValueError):
+    raise LoadError('difficulty and id must be integers')
+  return {
+    'id': id,
+    'question': question,
+    'answer': answer,
+    'category': categories.resolve(row.get('category')),
+    'difficulty': difficulty
+  }
+
+
+def write_batch(batch):
+  # returns (inserted, updated)
+  table = Question.__table__
+  by_id = {values['id']: values for values in batch if values['id'] is not None}
+  by_text = {values['question']: values for values in batch if values['id'] is None}
+
+  existing_ids = set()
+  if by_id:
+    existing_ids = {id for (id,) in db.session.query(Question.id).filter(Question.id.in_(list(by_id)))}
+  existing_texts = {}
+  if by_text:
+    existing_texts = dict(db.session.query(Question.question, Question.id)
+                          .filter(Question.question.in_(list(by_text))))
+
+  updates = [values for id, values in by_id.items() if id in existing_ids]
+  inserts = [values for id, values in by_id.items() if id not in existing_ids]
+  for text, values in by_text.items():
+    if text in existing_texts:
+      updates.append(dict(values, id=existing_texts[text]))
+    else:
+      inserts.append({key: value for key, value in values.items() if key != 'id'})
+
+  if updates:
+    db.session.execute(table.update().where(table.c.id == bindparam('_id')).values(
+      question=bindparam('question'), answer=bindparam('answer'),
+      category=bindparam('category'), difficulty=bindparam('difficulty')),
+      [dict(values, _id=values['id']) for values in updates])
+  # rows with and without an id can't share one executemany
+  for with_id in (True, False):
+    rows = [values for values in inserts if ('id' in values) == with_id]
+    if rows:
+      db.session.execute(table.insert(), rows)
+  db.session.commit()
+  return len(inserts), len(updates)
+
+
+'''
+load_questions(rows, batch_size=500, create_categories=True)
+  loads the (line number, row) pairs of read_ndjson or read_csv
+  returns a dict with the number of rows inserted, updated and skipped, the
+  errors ([(line number, message)]), the seconds it took and the rows/s
+'''
+def load_questions(rows, batch_size=500, create_categories=True):
+  start = time.perf_counter()
+  categories = CategoryMap(create_categories)
+  inserted = updated = 0
+  errors = []
+  batch = []
+
+  for number, row in rows:
+    try:
+      if isinstance(row, Exception):
+        raise row
+      batch.append(question_values(row, categories))
+    except LoadError as e:
+      errors.append((number, str(e)))
+      continue
+    if len(batch) >= batch_size:
+      counts = write_batch(batch)
+      inserted, updated = inserted + counts[0], updated + counts[1]
+      batch = []
+
+  if batch:
+    counts = write_batch(batch)
+    inserted, updated = inserted + counts[0], updated + counts[1]
+  if db.session.get_bind().dialect.name == 'postgresql':
+    # rows loaded with their id don't advance the id sequence
+    db.session.execute("SELECT setval(pg_get_serial_sequence('questions', 'id'), "
+                       "coalesce((SELECT max(id) FROM questions), 1))")
+  db.session.commit()
+
+  seconds = time.perf_counter() - start
+  return {
+    'inserted': inserted,
+    'updated': updated,
+    'skipped': len(errors),
+    'errors': errors,
+    'seconds': seconds,
+    'rows_per_second': (inserted + updated) / seconds if seconds else 0.0
+  }
@@ -0,0 +1,219 @@
+import base64
+import binascii
+import json
+import random
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from sqlalchemy import event, func, inspect
+
+from .pending import PendingChanges
+
+'''
+Keyset pagination
+
+Pages are read with `WHERE id >= <first id of the page> ORDER BY id LIMIT n`,
+which costs the same on page 1 and page 10,000, and cursors hold the last (or
+first) id seen, so they aren't thrown off by rows inserted or deleted between
+two requests. Clients move with opaque cursor tokens, or
+ask for a page number: the sorted ids of the listing are kept in memory, so a
+page number becomes the id it starts at and the total is their count, neither
+of which needs to scan the table. The ids are loaded on first use and kept in
+step with ORM inserts, updates and deletes committed by this process. Writes made
+by other processes (other workers, bulk loads) are picked up within `ttl`
+seconds: a listing older than that is checked against the count and the largest
+id in the table, and loaded again if they differ. The same ids let the quiz draw a
+random question without scanning its category (random_id).
+'''
+
+'''
+sample_excluding(ids, exclude, rng=random)
+  a random element of ids that isn't in the exclude set, or None if there is none
+  draws at random and retries on excluded ids, which is constant time while
+  exclude holds a minority of ids, and only lists the remaining ids otherwise
+'''
+def sample_excluding(ids, exclude, rng=random):
+  if len(exclude) * 2 < len(ids):
+    for _ in range(64):
+      id = ids[rng.randrange(len(ids))]
+      if id not in exclude:
+        return id
+  remaining = [id for id in ids if id not in exclude]
+  return rng.choice(remaining) if remaining else None
+
+
+class CursorError(ValueError):
+  pass
+
+
+def encode_cursor(**position):
+  return base64.urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+  try:
+    position = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+  except (binascii.Error, UnicodeDecodeError, ValueError):
+    raise CursorError('malformed cursor')
+  if not isinstance(position, dict) or len(position) != 1 \
+      or not isinstance(position.get('after', position.get('before')), int):
+    raise CursorError('malformed cursor')
+  return position
+
+
+class KeysetPaginator(object):
+
+  '''
+  KeysetPaginator(model, group_by=None, ttl=60, clock=time.monotonic)
+    paginates model by id, optionally within groups of rows sharing the value
+    of the group_by column (i.e. questions by category)
+    listings are checked against the table every ttl seconds
+  '''
+  def __init__(self, model, group_by=None, ttl=60, clock=time.monotonic):
+    self.model = model
+    self.group_by = group_by
+    self.ttl = ttl
+    self.clock = clock
+    self.ids = {}
+    self.checked_at = {}
+    self.lock = threading.Lock()
+    self.pending = PendingChanges(self._apply)
+
+    event.listen(model, 'after_insert', self._on_insert)
+    event.listen(model, 'after_update', self._on_update)
+    event.listen(model, 'after_delete', self._on_delete)
+
+  '''
+  reset() / invalidate(group=None)
+    forget every listing / the listing of a group, they are loaded again on next use
+    the listings only follow the writes of this process right away, call reset()
+    after writing to the table some other way (i.e. a bulk load) rather than
+    waiting up to ttl seconds for the change to be noticed
+  '''
+  def reset(self):
+    with self.lock:
+      self.ids = {}
+
+  def invalidate(self, group=None):
+    with self.lock:
+      self.ids.pop(group, None)
+
+  def _groups(self, group):
+    # every listing a row with this group value appears in
+    return (None,) if self.group_by is None else (None, group)
+
+  def _group_of(self, target):
+    return None if self.group_by is None else getattr(target, self.group_by.key)
+
+  # the events only record the change, _apply makes it once the session commits
+
+  def _on_insert(self, mapper, connection, target):
+    self.pending.record(target, (target.id, (), self._groups(self._group_of(target))))
+
+  def _on_delete(self, mapper, connection, target):
+    self.pending.record(target, (target.id, self._groups(self._group_of(target)), ()))
+
+  def _on_update(self, mapper, connection, target):
+    if self.group_by is None:
+      return
+    history = inspect(target).attrs[self.group_by.key].history
+    if history.has_changes():
+      self.pending.record(target, (target.id, history.deleted, (self._group_of(target),)))
+
+  def _apply(self, changes):
+    # changes are (id, listings it left, listings it joined)
+    with self.lock:
+      for id, left, joined in changes:
+        for group in left:
+          self._discard(group, id)
+        for group in joined:
+          self._insert(group, id)
+
+  def _insert(self, group, id):
+    ids = self.ids.get(group)
+    if ids is not None:
+      i = bisect_left(ids, id)
+      if i == len(ids) or ids[i] != id:
+        ids.insert(i, id)
+
+  def _discard(self, group, id):
+    ids = self.ids.get(group)
+    if ids is not None:
+      i = bisect_left(ids, id)
+      if i < len(ids) and ids[i] == id:
+        del ids[i]
+
+  def _query(self, session, group, *columns):
+    query = session.query(*columns)
+    if group is not None:
+      query = query.filter(self.group_by == group)
+    return query
+
+  def _ids(self, session, group):
+    # must be called with the lock held
+    ids = self.ids.get(group)
+    now = self.clock()
+    if ids is not None and now - self.checked_at[group] >= self.ttl:
+      # another process may have written to the table since the ids were loaded
+      count, last = self._query(session, group, func.count(self.model.id), func.max(self.model.id)).one()
+      if (count, last) != (len(ids), ids[-1] if ids else None):
+        ids = None
+      self.checked_at[group] = now
+    if ids is None:
+      query = self._query(session, group, self.model.id).order_by(self.model.id)
+      ids = self.ids[group] = array('q', (id for (id,) in query))
+      self.checked_at[group] = now
+    return ids
+
+  '''
+  total(session, group=None)
+    the number of rows in the listing
+  '''
+  def total(self, session, group=None):
+    with self.lock:
+      return len(self._ids(session, group))
+
+  '''
+  random_id(session, group=None, exclude=(), rng=random)
+    the id of a random row of the listing that isn't in the exclude set, or None
+  '''
+  def random_id(self, session, group=None, exclude=frozenset(), rng=random):
+    with self.lock:
+      return sample_excluding(self._ids(session, group), exclude, rng)
+
+  '''
+  page(query, page=1, cursor=None, per_page=10, group=None)
+    one page of query (which must select self.model, filtered to the group if
+    one is given), either the page-th page or the one a cursor token points at
+    returns a dict with the rows, the total, the page number and the cursors of
+    the next and previous pages (None at either end)
+    raises CursorError for a cursor that wasn't made by this paginator
+  '''
+  def page(self, query, page=1, cursor=None, per_page=10, group=None):
+    model = self.model
+    with self.lock:
+      ids = self._ids(query.session, group)
+      total = len(ids)
+      if cursor is not None:
+        position = decode_cursor(cursor)
+        if 'after' in position:
+          start = bisect_right(ids, position['after'])
+        else:
+          start = max(bisect_left(ids, position['before']) - per_page, 0)
+      else:
+        start = (page - 1) * per_page
+      anchor = ids[start] if 0 <= start < total else None
+
+    if anchor is None:
+      rows = []
+    else:
+      rows = query.filter(model.id >= anchor).order_by(model.id).limit(per_page).all()
+
+    return {
+      'rows': rows,
+      'total': total,
+      'page': start // per_page + 1,
+      'next_cursor': encode_cursor(after=rows[-1].id) if rows and start + per_page < total else None,
+      'prev_cursor': encode_cursor(before=rows[0].id) if rows and start > 0 else None
+    }
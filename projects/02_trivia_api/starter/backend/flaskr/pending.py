@@ -0,0 +1,34 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+'''
+Pending changes
+
+The in-memory indexes (pagination.py, search.py) follow ORM writes through
+mapper events, which fire when a session flushes, before it is known whether
+the transaction commits. PendingChanges holds what each session flushed and
+hands it to the index once that session commits; a rollback drops it.
+'''
+
+class PendingChanges(object):
+
+  '''
+  PendingChanges(apply)
+    calls apply(changes) with the changes recorded for a session, in the order
+    they were recorded, after the session commits
+  '''
+  def __init__(self, apply):
+    self.apply = apply
+    event.listen(Session, 'after_commit', self._on_commit)
+    event.listen(Session, 'after_rollback', self._on_rollback)
+
+  def record(self, target, change):
+    object_session(target).info.setdefault(self, []).append(change)
+
+  def _on_commit(self, session):
+    changes = session.info.pop(self, None)
+    if changes:
+      self.apply(changes)
+
+  def _on_rollback(self, session):
+    session.info.pop(self, None)
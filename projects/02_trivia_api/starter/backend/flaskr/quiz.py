@@ -0,0 +1,111 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+'''
+Quiz sessions
+
+A quiz played with a session keeps the ids of the questions already asked on
+the server, so each turn sends a short session id instead of the growing
+previous_questions list. The asked ids are a sparse bitset: 64 ids per word,
+only the words holding an asked id are stored, so recording and checking an id
+costs the same on the first turn and the hundredth, and a session takes memory
+in proportion to the questions it asked rather than to the largest id.
+
+Sessions live in the memory of this process and expire after ttl seconds
+without a turn; the oldest are dropped first once there are max_sessions.
+Running more than one worker process needs requests of a session to reach the
+same worker.
+'''
+
+class AskedIds(object):
+  # a sparse bitset of ids, usable as the exclude set of sample_excluding
+
+  def __init__(self, ids=()):
+    self.words = {}
+    self.count = 0
+    for id in ids:
+      self.add(id)
+
+  def add(self, id):
+    word, bit = divmod(id, 64)
+    bits = self.words.get(word, 0)
+    if not bits >> bit & 1:
+      self.words[word] = bits | 1 << bit
+      self.count += 1
+
+  def __contains__(self, id):
+    word, bit = divmod(id, 64)
+    return bool(self.words.get(word, 0) >> bit & 1)
+
+  def __len__(self):
+    return self.count
+
+
+class QuizSession(object):
+
+  def __init__(self, id, category, asked):
+    self.id = id
+    self.category = category
+    self.asked = asked
+    self.lock = threading.Lock()
+    self.expires = 0
+
+
+class QuizSessions(object):
+
+  '''
+  QuizSessions(ttl=3600, max_sessions=100000, clock=time.monotonic)
+    the quiz sessions of this process, by id
+  '''
+  def __init__(self, ttl=3600, max_sessions=100000, clock=time.monotonic):
+    self.ttl = ttl
+    self.max_sessions = max_sessions
+    self.clock = clock
+    # least recently used first, which is also soonest to expire
+    self.sessions = OrderedDict()
+    self.lock = threading.Lock()
+
+  def __len__(self):
+    return len(self.sessions)
+
+  def reset(self):
+    with self.lock:
+      self.sessions.clear()
+
+  def _evict(self, now):
+    # must be called with the lock held
+    while self.sessions:
+      oldest = next(iter(self.sessions.values()))
+      if oldest.expires > now and len(self.sessions) < self.max_sessions:
+        break
+      self.sessions.popitem(last=False)
+
+  '''
+  start(category=0, asked=())
+    a new session of the category (0 is all of them), with the ids in asked
+    already counted as asked
+  '''
+  def start(self, category=0, asked=()):
+    session = QuizSession(secrets.token_urlsafe(12), category, AskedIds(asked))
+    with self.lock:
+      now = self.clock()
+      self._evict(now)
+      session.expires = now + self.ttl
+      self.sessions[session.id] = session
+    return session
+
+  '''
+  get(id)
+    the session with this id, its expiry pushed back by ttl, or None once it expired
+  '''
+  def get(self, id):
+    with self.lock:
+      now = self.clock()
+      self._evict(now)
+      session = self.sessions.get(id)
+      if session is not None:
+        session.expires = now + self.ttl
+        self.sessions.move_to_end(id)
+      return session
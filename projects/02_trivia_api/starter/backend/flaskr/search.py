@@ -0,0 +1,167 @@
+import heapq
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+from sqlalchemy import event, func, literal_column
+
+from .pending import PendingChanges
+
+'''
+Question search
+
+A search term matches the questions containing all of its words. The last one
+may be any part of a word, as the endpoint always matched substrings
+case-insensitively ("title" finds "entitled") and results follow the frontend
+as it is typed ("penic" finds "penicillin"). Results are ranked by how often
+the words occur, then by id.
+
+On PostgreSQL the whole words run as a full text query served by the GIN index
+ix_questions_question_fts (the 'simple' configuration: no stemming and no stop
+words) and the last one as an ILIKE served by the trigram index
+ix_questions_question_trgm. Other databases (SQLite for tests and benchmarks) use an in-memory
+inverted index with the same matching rules, loaded on first use and kept in
+step with ORM writes committed by this process; call reset() after bulk loads.
+'''
+
+def words(text):
+  return re.findall(r'\w+', (text or '').lower())
+
+
+class InvertedIndex(object):
+
+  def __init__(self, model, column):
+    self.model = model
+    self.column = column
+    self.postings = None
+    self.documents = {}
+    self.vocabulary = []
+    self.lock = threading.Lock()
+    self.pending = PendingChanges(self._apply)
+
+    event.listen(model, 'after_insert', self._on_write)
+    event.listen(model, 'after_update', self._on_write)
+    event.listen(model, 'after_delete', self._on_delete)
+
+  def reset(self):
+    with self.lock:
+      self.postings = None
+      self.vocabulary = []
+
+  def _build(self, session):
+    self.postings = {}
+    self.documents = {}
+    # sorted once at the end rather than kept sorted while loading
+    self.vocabulary = None
+    for id, text in session.query(self.model.id, self.column):
+      self._add(id, text)
+    self.vocabulary = sorted(self.postings)
+
+  def _add(self, id, text):
+    counts = Counter(words(text))
+    self.documents[id] = counts
+    for word, count in counts.items():
+      if word not in self.postings:
+        self.postings[word] = {}
+        if self.vocabulary is not None:
+          self.vocabulary.insert(bisect_left(self.vocabulary, word), word)
+      self.postings[word][id] = count
+
+  def _remove(self, id):
+    for word in self.documents.pop(id, ()):
+      self.postings[word].pop(id, None)
+
+  def _on_write(self, mapper, connection, target):
+    self.pending.record(target, (target.id, getattr(target, self.column.key)))
+
+  def _on_delete(self, mapper, connection, target):
+    self.pending.record(target, (target.id, None))
+
+  def _apply(self, changes):
+    # changes are (id, text or None once deleted), made once the session commits
+    with self.lock:
+      if self.postings is not None:
+        for id, text in changes:
+          self._remove(id)
+          if text is not None:
+            self._add(id, text)
+
+  def _containing(self, part):
+    # a scan of the distinct words, far fewer than the rows
+    return (word for word in self.vocabulary if part in word)
+
+  '''
+  search(session, terms, offset=0, limit=10)
+    the ids of the rows containing every word of terms (the last one as any part of a word),
+    best ranked first, from offset to offset + limit, and the number of such rows
+  '''
+  def search(self, session, terms, offset=0, limit=10):
+    with self.lock:
+      if self.postings is None:
+        self._build(session)
+
+      scores = None
+      for i, term in enumerate(terms):
+        matches = Counter()
+        for word in (self._containing(term) if i == len(terms) - 1 else [term]):
+          matches.update(self.postings.get(word, {}))
+        if scores is None:
+          scores = matches
+        else:
+          scores = Counter({id: scores[id] + count for id, count in matches.items() if id in scores})
+        if not scores:
+          return [], 0
+
+    # only the rows up to the requested page need to be ranked
+    ranked = heapq.nsmallest(offset + limit, scores.items(), key=lambda item: (-item[1], item[0]))
+    return [id for id, score in ranked[offset:]], len(scores)
+
+
+class QuestionSearch(object):
+
+  def __init__(self, model):
+    self.model = model
+    self.index = InvertedIndex(model, model.question)
+
+  def reset(self):
+    self.index.reset()
+
+  '''
+  search(query, search_term, page=1, per_page=10)
+    one page of the rows of query (which selects the model) matching search_term,
+    best ranked first
+    returns (rows, total)
+  '''
+  def search(self, query, search_term, page=1, per_page=10):
+    terms = words(search_term)
+    if not terms:
+      return [], 0
+    offset = (page - 1) * per_page
+
+    if query.session.get_bind().dialect.name == 'postgresql':
+      return self._search_postgres(query, terms, offset, per_page)
+
+    page_ids, total = self.index.search(query.session, terms, offset, per_page)
+    rows = query.filter(self.model.id.in_(page_ids)).all() if page_ids else []
+    position = {id: i for i, id in enumerate(page_ids)}
+    rows.sort(key=lambda row: position[row.id])
+    return rows, total
+
+  def _search_postgres(self, query, terms, offset, per_page):
+    # terms are \w+ words, so they can be written into the tsquery as they are,
+    # only '_' needs escaping in the LIKE pattern
+    vector = func.to_tsvector(literal_column("'simple'"), self.model.question)
+    matching = query.filter(self.model.question.ilike(
+      '%' + terms[-1].replace('_', '\\_') + '%', escape='\\'))
+    if len(terms) > 1:
+      words_query = func.to_tsquery(literal_column("'simple'"), ' & '.join(terms[:-1]))
+      matching = matching.filter(vector.op('@@')(words_query))
+
+    # ranked as if the last term were a prefix, questions where it only
+    # occurs inside a word come after those where it starts one
+    tsquery = func.to_tsquery(literal_column("'simple'"),
+                              ' & '.join(terms[:-1] + [terms[-1] + ':*']))
+
+    rows = matching.order_by(func.ts_rank(vector, tsquery).desc(), self.model.id)\
+                   .offset(offset).limit(per_page).all()
+    return rows, matching.count()
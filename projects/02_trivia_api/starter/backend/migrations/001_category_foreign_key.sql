@@ -0,0 +1,34 @@
+-- Makes questions.category an indexed integer foreign key to categories.id.
+--
+-- trivia.psql already creates the column as an integer with the foreign key,
+-- databases created by db.create_all() before this change have it as text.
+-- Safe to run more than once:
+--
+--   psql trivia < migrations/001_category_foreign_key.sql
+
+BEGIN;
+
+ALTER TABLE public.questions
+    ALTER COLUMN category TYPE integer USING NULLIF(trim(category::text), '')::integer;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'public.questions'::regclass AND contype = 'f'
+    ) THEN
+        -- questions pointing at a category that doesn't exist lose it,
+        -- as they would if the category were deleted
+        UPDATE public.questions SET category = NULL
+        WHERE category IS NOT NULL
+          AND category NOT IN (SELECT id FROM public.categories);
+
+        ALTER TABLE ONLY public.questions
+            ADD CONSTRAINT category FOREIGN KEY (category) REFERENCES public.categories(id) ON UPDATE CASCADE ON DELETE SET NULL;
+    END IF;
+END
+$$;
+
+CREATE INDEX IF NOT EXISTS ix_questions_category_id ON public.questions USING btree (category, id);
+
+COMMIT;
@@ -0,0 +1,6 @@
+-- GIN index over the words of the questions, used by the question search
+-- (flaskr/search.py). The expression must stay the same as the one searched.
+--
+--   psql trivia < migrations/002_question_search_index.sql
+
+CREATE INDEX IF NOT EXISTS ix_questions_question_fts ON public.questions USING gin (to_tsvector('simple', question));
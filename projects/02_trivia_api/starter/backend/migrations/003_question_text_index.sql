@@ -0,0 +1,6 @@
+-- Index on the question text, used by flask load-questions to find the
+-- question a loaded row without an id replaces.
+--
+--   psql trivia < migrations/003_question_text_index.sql
+
+CREATE INDEX IF NOT EXISTS ix_questions_question ON public.questions USING hash (question);
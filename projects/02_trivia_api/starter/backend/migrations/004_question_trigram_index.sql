@@ -0,0 +1,7 @@
+-- Trigram index on the questions, used by the question search (flaskr/search.py)
+-- to match the last word of a search term anywhere inside a word.
+--
+--   psql trivia < migrations/004_question_trigram_index.sql
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS ix_questions_question_trgm ON public.questions USING gin (question gin_trgm_ops);
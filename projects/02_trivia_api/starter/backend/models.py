@@ -1,5 +1,5 @@
 import os
-from sqlalchemy import Column, String, Integer, create_engine
+from sqlalchemy import Column, String, Integer, ForeignKey, Index, DDL, create_engine, event
 from flask_sqlalchemy import SQLAlchemy
 import json
 
@@ -25,11 +25,19 @@ Question
 '''
 class Question(db.Model):  
   __tablename__ = 'questions'
+  __table_args__ = (
+    # serves the category listings and quiz draws in id order,
+    # see migrations/001_category_foreign_key.sql for existing databases
+    Index('ix_questions_category_id', 'category', 'id'),
+    # finds the question a loaded row replaces (see flaskr/loader.py),
+    # see migrations/003_question_text_index.sql for existing databases
+    Index('ix_questions_question', 'question', postgresql_using='hash'),
+  )
 
   id = Column(Integer, primary_key=True)
   question = Column(String)
   answer = Column(String)
-  category = Column(String)
+  category = Column(Integer, ForeignKey('categories.id', onupdate='CASCADE', ondelete='SET NULL'))
   difficulty = Column(Integer)
 
   def __init__(self, question, answer, category, difficulty):
@@ -58,6 +66,28 @@ class Question(db.Model):
       'difficulty': self.difficulty
     }
 
+'''
+ix_questions_question_fts
+  GIN index over the words of the questions, for full text search on PostgreSQL
+  (see flaskr/search.py), created with the table on PostgreSQL only and by
+  migrations/002_question_search_index.sql for existing databases
+'''
+event.listen(Question.__table__, 'after_create', DDL(
+  "CREATE INDEX IF NOT EXISTS ix_questions_question_fts ON questions "
+  "USING gin (to_tsvector('simple', question))").execute_if(dialect='postgresql'))
+
+'''
+ix_questions_question_trgm
+  GIN trigram index on the questions, for the substring match of the last search
+  word on PostgreSQL (see flaskr/search.py), created like ix_questions_question_fts
+  and by migrations/004_question_trigram_index.sql for existing databases
+'''
+event.listen(Question.__table__, 'after_create', DDL(
+  "CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect='postgresql'))
+event.listen(Question.__table__, 'after_create', DDL(
+  "CREATE INDEX IF NOT EXISTS ix_questions_question_trgm ON questions "
+  "USING gin (question gin_trgm_ops)").execute_if(dialect='postgresql'))
+
 '''
 Category
 
@@ -1,10 +1,11 @@
 import os
+import tempfile
 import unittest
 import json
 from flask_sqlalchemy import SQLAlchemy
 
-from flaskr import create_app
-from models import setup_db, Question, Category
+from flaskr import create_app, question_pages
+from models import setup_db, db, Question, Category
 
 
 class TriviaTestCase(unittest.TestCase):
@@ -12,11 +13,11 @@ class TriviaTestCase(unittest.TestCase):
 
     def setUp(self):
         """Define test variables and initialize app."""
-        self.app = create_app()
-        self.client = self.app.test_client
         self.database_name = "trivia_test"
-        self.database_path = "postgres://{}/{}".format('localhost:5432', self.database_name)
-        setup_db(self.app, self.database_path)
+        self.database_path = os.environ.get('TRIVIA_TEST_DATABASE_URL',
+            "postgres://{}/{}".format('localhost:5432', self.database_name))
+        self.app = create_app({'SQLALCHEMY_DATABASE_URI': self.database_path})
+        self.client = self.app.test_client
 
         # binds the app to the current context
         with self.app.app_context():
@@ -24,6 +25,11 @@ class TriviaTestCase(unittest.TestCase):
             self.db.init_app(self.app)
             # create all tables
             self.db.create_all()
+            # the categories of trivia.psql, when testing against an empty database
+            if not Category.query.count():
+                for type in ['Science', 'Art', 'Geography', 'History', 'Entertainment', 'Sports']:
+                    self.db.session.add(Category(type))
+                self.db.session.commit()
     
     def tearDown(self):
         """Executed after reach test"""
@@ -34,6 +40,314 @@ class TriviaTestCase(unittest.TestCase):
     Write at least one test for each test for successful operation and for expected errors.
     """
 
+    def add_questions(self, count, category=1):
+        with self.app.app_context():
+            questions = [Question('Question %d?' % i, 'Answer %d' % i, category, 1) for i in range(count)]
+            for question in questions:
+                question.insert()
+            return [question.id for question in questions]
+
+    def delete_questions(self, ids):
+        with self.app.app_context():
+            for id in ids:
+                question = Question.query.get(id)
+                if question:
+                    question.delete()
+
+    def test_get_questions_paginated(self):
+        ids = self.add_questions(3)
+        res = self.client().get('/questions?page=1')
+        data = json.loads(res.data)
+        with self.app.app_context():
+            num_questions = Question.query.count()
+            num_categories = Category.query.count()
+        self.delete_questions(ids)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data['success'])
+        self.assertEqual(data['total_questions'], num_questions)
+        self.assertTrue(0 < len(data['questions']) <= 10)
+        self.assertEqual(len(data['categories']), num_categories)
+
+    def test_rolled_back_writes_leave_listing_unchanged(self):
+        ids = self.add_questions(1)
+        total = json.loads(self.client().get('/questions').data)['total_questions']
+        with self.app.app_context():
+            db.session.add(Question('Rolled back?', 'Yes', 1, 1))
+            db.session.flush()
+            db.session.rollback()
+        after_insert = json.loads(self.client().get('/questions').data)['total_questions']
+        with self.app.app_context():
+            db.session.delete(Question.query.get(ids[0]))
+            db.session.flush()
+            db.session.rollback()
+        after_delete = json.loads(self.client().get('/questions').data)['total_questions']
+        self.delete_questions(ids)
+
+        self.assertEqual(after_insert, total)
+        self.assertEqual(after_delete, total)
+
+    def test_listing_notices_writes_of_other_processes(self):
+        ids = self.add_questions(1)
+        self.client().get('/questions')
+        with self.app.app_context():
+            # what another worker's insert looks like to this process
+            db.session.execute(Question.__table__.insert(), [
+                {'question': 'Inserted elsewhere?', 'answer': 'Yes', 'category': 1, 'difficulty': 1}])
+            db.session.commit()
+            ids += [q.id for q in Question.query.filter(Question.question == 'Inserted elsewhere?')]
+            num_questions = Question.query.count()
+        ttl = question_pages.ttl
+        question_pages.ttl = 0
+        try:
+            data = json.loads(self.client().get('/questions').data)
+        finally:
+            question_pages.ttl = ttl
+        self.delete_questions(ids)
+
+        self.assertEqual(data['total_questions'], num_questions)
+
+    def test_404_requesting_beyond_valid_page(self):
+        res = self.client().get('/questions?page=1000000')
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 404)
+        self.assertFalse(data['success'])
+        self.assertEqual(data['message'], 'resource not found')
+
+    def test_cursors_survive_inserts_and_deletes(self):
+        ids = self.add_questions(12)
+        seen = []
+        res = self.client().get('/questions?per_page=5')
+        data = json.loads(res.data)
+        seen += [q['id'] for q in data['questions']]
+
+        # a question deleted behind the cursor and one added after it
+        # neither shift nor repeat the following pages
+        self.delete_questions([seen[0]])
+        ids += self.add_questions(1)
+        while data['next_cursor']:
+            res = self.client().get('/questions?per_page=5&cursor=' + data['next_cursor'])
+            data = json.loads(res.data)
+            seen += [q['id'] for q in data['questions']]
+        self.delete_questions(ids)
+
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(seen, sorted(seen))
+        self.assertTrue(set(ids[1:]) <= set(seen))
+
+    def test_400_for_malformed_cursor(self):
+        res = self.client().get('/questions?cursor=not-a-cursor')
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(data['success'])
+
+    def test_create_question(self):
+        res = self.client().post('/questions', json={
+            'question': 'What is the capital of Denmark?', 'answer': 'Copenhagen',
+            'category': 3, 'difficulty': 1})
+        data = json.loads(res.data)
+        self.delete_questions([data.get('created')])
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data['success'])
+
+    def test_422_creating_question_in_unknown_category(self):
+        res = self.client().post('/questions', json={
+            'question': 'What is the capital of Denmark?', 'answer': 'Copenhagen',
+            'category': 1000, 'difficulty': 1})
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 422)
+        self.assertFalse(data['success'])
+
+    def test_get_category_questions(self):
+        ids = self.add_questions(12, category=2)
+        res = self.client().get('/categories/2/questions?page=2')
+        data = json.loads(res.data)
+        self.delete_questions(ids)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['current_category'], 'Art')
+        self.assertTrue(data['total_questions'] >= 12)
+        self.assertTrue(all(q['category'] == 2 for q in data['questions']))
+
+    def test_404_for_questions_of_unknown_category(self):
+        res = self.client().get('/categories/1000/questions')
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 404)
+        self.assertFalse(data['success'])
+
+    def test_search_questions(self):
+        with self.app.app_context():
+            question = Question('Who discovered penicillin, and penicillin what?', 'Fleming', 1, 3)
+            question.insert()
+            other = Question('Is penicillin a drug?', 'Yes', 1, 1)
+            other.insert()
+            ids = [question.id, other.id]
+        res = self.client().post('/questions', json={'searchTerm': 'PENIC'})
+        data = json.loads(res.data)
+        self.delete_questions(ids)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data['success'])
+        self.assertTrue(data['total_questions'] >= 2)
+        found = [q['id'] for q in data['questions']]
+        # ranked by the number of matches
+        self.assertTrue(found.index(ids[0]) < found.index(ids[1]))
+
+    def test_search_matches_inside_words(self):
+        with self.app.app_context():
+            question = Question('Whose autobiography is Entitled "I Know Why the Caged Bird Sings"?',
+                                'Maya Angelou', 4, 2)
+            question.insert()
+            id = question.id
+        found = json.loads(self.client().post('/questions', json={'searchTerm': 'TITLE'}).data)
+        # only the last word may be part of a word
+        not_found = json.loads(self.client().post('/questions', json={'searchTerm': 'title bird'}).data)
+        self.delete_questions([id])
+
+        self.assertIn(id, [q['id'] for q in found['questions']])
+        self.assertNotIn(id, [q['id'] for q in not_found['questions']])
+
+    def test_search_questions_without_results(self):
+        res = self.client().post('/questions', json={'searchTerm': 'xyzzy plugh'})
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['total_questions'], 0)
+        self.assertEqual(data['questions'], [])
+
+    def test_rolled_back_question_is_not_found(self):
+        self.client().post('/questions', json={'searchTerm': 'warm up'})
+        with self.app.app_context():
+            db.session.add(Question('Rolledbackword?', 'Yes', 1, 1))
+            db.session.flush()
+            db.session.rollback()
+        res = self.client().post('/questions', json={'searchTerm': 'rolledbackword'})
+        data = json.loads(res.data)
+
+        self.assertEqual(data['total_questions'], 0)
+        self.assertEqual(data['questions'], [])
+
+    def test_load_questions_is_idempotent(self):
+        path = os.path.join(tempfile.mkdtemp(), 'questions.ndjson')
+        with open(path, 'w') as f:
+            f.write(json.dumps({'question': 'Loaded question one?', 'answer': 'One',
+                                'category': 'Science', 'difficulty': 1}) + '\n')
+            f.write(json.dumps({'question': 'Loaded question two?', 'answer': 'Two',
+                                'category': 4, 'difficulty': 2}) + '\n')
+            f.write('not json\n')
+        runner = self.app.test_cli_runner()
+
+        first = runner.invoke(args=['load-questions', path])
+        second = runner.invoke(args=['load-questions', path])
+        with self.app.app_context():
+            loaded = Question.query.filter(Question.question.like('Loaded question %')).all()
+            ids = [question.id for question in loaded]
+        self.delete_questions(ids)
+
+        self.assertIn('2 inserted, 0 updated, 1 skipped', first.output)
+        self.assertIn('0 inserted, 2 updated, 1 skipped', second.output)
+        self.assertEqual(len(loaded), 2)
+
+    def test_play_quiz_skips_previous_questions(self):
+        ids = self.add_questions(3, category=6)
+        res = self.client().post('/quizzes', json={
+            'previous_questions': ids[:2],
+            'quiz_category': {'type': 'Sports', 'id': 6}})
+        data = json.loads(res.data)
+        self.delete_questions(ids)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data['success'])
+        self.assertNotIn(data['question']['id'], ids[:2])
+        self.assertEqual(data['question']['category'], 6)
+
+    def test_play_quiz_skips_questions_deleted_elsewhere(self):
+        ids = self.add_questions(5, category=6)
+        with self.app.app_context():
+            others = [q.id for q in Question.query.filter(Question.category == 6) if q.id not in ids]
+        self.client().post('/quizzes', json={'previous_questions': [], 'quiz_category': {'type': 'Sports', 'id': 6}})
+        with self.app.app_context():
+            db.session.execute(Question.__table__.delete().where(Question.id.in_(ids[:4])))
+            db.session.commit()
+        res = self.client().post('/quizzes', json={
+            'previous_questions': others,
+            'quiz_category': {'type': 'Sports', 'id': 6}})
+        data = json.loads(res.data)
+        self.delete_questions(ids)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['question']['id'], ids[4])
+
+    def test_play_quiz_ends_when_category_is_exhausted(self):
+        ids = self.add_questions(2, category=6)
+        with self.app.app_context():
+            in_category = [q.id for q in Question.query.filter(Question.category == 6)]
+        res = self.client().post('/quizzes', json={
+            'previous_questions': in_category,
+            'quiz_category': {'type': 'Sports', 'id': 6}})
+        data = json.loads(res.data)
+        self.delete_questions(ids)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIsNone(data['question'])
+
+    def test_play_quiz_with_session(self):
+        ids = self.add_questions(3, category=6)
+        with self.app.app_context():
+            in_category = {q.id for q in Question.query.filter(Question.category == 6)}
+        res = self.client().post('/quizzes', json={'start_session': True,
+                                                   'quiz_category': {'type': 'Sports', 'id': 6}})
+        session = json.loads(res.data)['quiz_session']
+        asked = [json.loads(res.data)['question']['id']]
+        for _ in range(len(in_category)):
+            res = self.client().post('/quizzes', json={'quiz_session': session})
+            question = json.loads(res.data)['question']
+            if question:
+                asked.append(question['id'])
+        self.delete_questions(ids)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIsNone(question)
+        self.assertEqual(sorted(asked), sorted(in_category))
+
+    def test_play_quiz_starts_no_session_unless_asked(self):
+        ids = self.add_questions(1, category=6)
+        res = self.client().post('/quizzes', json={
+            'previous_questions': [],
+            'quiz_category': {'type': 'Sports', 'id': 6}})
+        data = json.loads(res.data)
+        self.delete_questions(ids)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIsNotNone(data['question'])
+        self.assertIsNone(data['quiz_session'])
+
+    def test_404_for_unknown_quiz_session(self):
+        res = self.client().post('/quizzes', json={'quiz_session': 'expired'})
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 404)
+        self.assertFalse(data['success'])
+
+    def test_400_for_malformed_quiz_request(self):
+        res = self.client().post('/quizzes', json={'previous_questions': 'none'})
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(data['success'])
+
+    def test_400_for_malformed_quiz_category(self):
+        res = self.client().post('/quizzes', json={'previous_questions': [], 'quiz_category': 'Sports'})
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(data['success'])
+
 
 # Make the tests conveniently executable
 if __name__ == "__main__":
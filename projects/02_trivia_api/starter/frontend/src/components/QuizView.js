@@ -11,6 +11,7 @@ class QuizView extends Component {
     this.state = {
         quizCategory: null,
         previousQuestions: [], 
+        quizSession: null,
         showAnswer: false,
         categories: {},
         numCorrect: 0,
@@ -47,12 +48,19 @@ class QuizView extends Component {
     const previousQuestions = [...this.state.previousQuestions]
     if(this.state.currentQuestion.id) { previousQuestions.push(this.state.currentQuestion.id) }
 
+    // the server keeps the questions asked in the quiz session, so once it
+    // started only its id is sent; without one (or once it expired) the
+    // previous questions are sent and a new session is asked for
+    const quizSession = this.state.quizSession
     $.ajax({
       url: '/quizzes', //TODO: update request URL
       type: "POST",
       dataType: 'json',
       contentType: 'application/json',
-      data: JSON.stringify({
+      data: JSON.stringify(quizSession ? {
+        quiz_session: quizSession
+      } : {
+        start_session: true,
         previous_questions: previousQuestions,
         quiz_category: this.state.quizCategory
       }),
@@ -64,6 +72,7 @@ class QuizView extends Component {
         this.setState({
           showAnswer: false,
           previousQuestions: previousQuestions,
+          quizSession: result.quiz_session,
           currentQuestion: result.question,
           guess: '',
           forceEnd: result.question ? false : true
@@ -71,6 +80,10 @@ class QuizView extends Component {
         return;
       },
       error: (error) => {
+        if (quizSession && error.status === 404) {
+          this.setState({quizSession: null}, this.getNextQuestion)
+          return;
+        }
         alert('Unable to load question. Please try your request again')
         return;
       }
@@ -91,6 +104,7 @@ class QuizView extends Component {
     this.setState({
       quizCategory: null,
       previousQuestions: [], 
+      quizSession: null,
       showAnswer: false,
       numCorrect: 0,
       currentQuestion: {},
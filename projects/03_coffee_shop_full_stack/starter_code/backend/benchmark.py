@@ -0,0 +1,120 @@
+'''
+Benchmarks for the coffee shop backend.
+Run from the backend directory, i.e.
+
+    python benchmark.py auth --permissions 5 50 500
+'''
+import argparse
+import json
+import time
+
+from flask import Flask
+
+from src.auth.auth import requires_auth, verified_tokens
+from src.database.models import Drink
+
+
+'''
+measure(f, repeat)
+    returns the mean time of a call to f in microseconds
+'''
+def measure(f, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        f()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+'''
+bench_auth(args)
+    per-request overhead of @requires_auth for a token that is already
+    verified (so no RS256 work), against the original check_permissions list scan,
+    for tokens holding a growing number of permissions
+'''
+def bench_auth(args):
+    app = Flask(__name__)
+
+    @requires_auth('patch:drinks')
+    def single(payload):
+        return payload
+
+    @requires_auth(any_of=['patch:drinks', 'post:drinks'])
+    def any_of(payload):
+        return payload
+
+    @requires_auth(all_of=['get:drinks-detail', 'patch:drinks'])
+    def all_of(payload):
+        return payload
+
+    @requires_auth('*:drinks')
+    def pattern(payload):
+        return payload
+
+    print('%12s %14s %14s %14s %14s %14s' % (
+        'permissions', 'list scan us', 'single us', 'any_of us', 'all_of us', 'pattern us'))
+    for num_permissions in args.permissions:
+        # the granted permissions the routes look for come last
+        permissions = ['read:thing-%d' % i for i in range(num_permissions)] + \
+            ['get:drinks-detail', 'patch:drinks']
+        payload = {'exp': time.time() + 3600, 'permissions': permissions}
+        token = 'benchmark-token-%d' % num_permissions
+
+        verified_tokens.clear()
+        verified_tokens.put(token, payload, frozenset(permissions))
+
+        with app.test_request_context(headers={'Authorization': 'Bearer ' + token}):
+            print('%12d %14.2f %14.2f %14.2f %14.2f %14.2f' % (
+                num_permissions,
+                measure(lambda: 'patch:drinks' in payload['permissions'], args.repeat),
+                measure(single, args.repeat),
+                measure(any_of, args.repeat),
+                measure(all_of, args.repeat),
+                measure(pattern, args.repeat)))
+
+
+'''
+bench_serialize(args)
+    time to serialize the drinks menu with short() and long(), against decoding
+    every recipe from a json string as when recipe was a String column
+'''
+def bench_serialize(args):
+    recipe = [{'name': 'water', 'color': 'blue', 'parts': 1},
+              {'name': 'coffee', 'color': 'brown', 'parts': 2},
+              {'name': 'milk', 'color': 'white', 'parts': 1}]
+    drinks = [Drink(id=i, title='drink %d' % i, recipe=list(recipe)) for i in range(args.drinks)]
+    blobs = {drink.id: json.dumps(drink.recipe) for drink in drinks}
+
+    def short_decoded(drink):
+        return {'id': drink.id, 'title': drink.title,
+                'recipe': [{'color': r['color'], 'parts': r['parts']} for r in json.loads(blobs[drink.id])]}
+
+    def long_decoded(drink):
+        return {'id': drink.id, 'title': drink.title, 'recipe': json.loads(blobs[drink.id])}
+
+    def menu(serialize):
+        start = time.perf_counter()
+        for drink in drinks:
+            serialize(drink)
+        return (time.perf_counter() - start) * 1e3
+
+    print('%8s %16s %16s' % ('', 'json.loads ms', 'json column ms'))
+    print('%8s %16.2f %16.2f' % ('short', menu(short_decoded), menu(Drink.short)))
+    print('%8s %16.2f %16.2f' % ('long', menu(long_decoded), menu(Drink.long)))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='benchmark')
+    subparsers.required = True
+
+    auth_parser = subparsers.add_parser('auth', help='@requires_auth overhead per request')
+    auth_parser.add_argument('--permissions', type=int, nargs='+', default=[5, 50, 500])
+    auth_parser.add_argument('--repeat', type=int, default=20000)
+    auth_parser.set_defaults(func=bench_auth)
+
+    serialize_parser = subparsers.add_parser('serialize', help='short() and long() over the menu')
+    serialize_parser.add_argument('--drinks', type=int, default=10000)
+    serialize_parser.set_defaults(func=bench_serialize)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -1,10 +1,13 @@
 import os
-from flask import Flask, request, jsonify, abort
+import click
+from flask import Flask, request, jsonify, abort, stream_with_context
 from sqlalchemy import exc
 import json
+from urllib.parse import quote
 from flask_cors import CORS
 
-from .database.models import db_drop_and_create_all, setup_db, Drink
+from .database.models import db, db_drop_and_create_all, setup_db, Drink, MenuVersion, RecipeError, validate_recipe
+from .database.bulk import import_drinks, export_drinks
 from .auth.auth import AuthError, requires_auth
 
 app = Flask(__name__)
@@ -18,6 +21,58 @@ CORS(app)
 '''
 # db_drop_and_create_all()
 
+'''
+menu_response(representation)
+    the whole menu as json, each drink in the given representation ('short' or 'long')
+    the serialized body is kept per representation until the MenuVersion changes, and a
+    request whose If-None-Match matches the current ETag gets a 304 after reading only
+    the version row, which every worker process shares
+    with ?ingredient=<name> only the drinks using that ingredient are listed (not kept)
+'''
+menu_bodies = {}
+
+def menu_response(representation):
+    ingredient = request.args.get('ingredient', '').strip().lower()
+    version = MenuVersion.current()
+    etag = MenuVersion.etag(representation + (':' + quote(ingredient) if ingredient else ''), version)
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    cached = None if ingredient else menu_bodies.get(representation)
+    if cached is None or cached[0] != version:
+        # version was read before the query, so a write racing it leaves the
+        # body stored under the older version and it is rebuilt next time
+        query = Drink.with_ingredient(ingredient) if ingredient else Drink.query
+        drinks = query.order_by(Drink.id).all()
+        body = json.dumps({
+            'success': True,
+            'drinks': [getattr(drink, representation)() for drink in drinks]
+        })
+        cached = (version, body)
+        if not ingredient:
+            menu_bodies[representation] = cached
+
+    response = app.response_class(cached[1], mimetype='application/json')
+    response.set_etag(etag)
+    return response
+
+'''
+recipe_from(body)
+    the recipe of a request body, a single ingredient is accepted as a one item list
+    responds with 422 if it doesn't follow the recipe schema (see validate_recipe)
+'''
+def recipe_from(body):
+    recipe = body.get('recipe')
+    if isinstance(recipe, dict):
+        recipe = [recipe]
+    try:
+        validate_recipe(recipe)
+    except RecipeError:
+        abort(422)
+    return recipe
+
 ## ROUTES
 '''
 @TODO implement endpoint
@@ -27,6 +82,9 @@ CORS(app)
     returns status code 200 and json {"success": True, "drinks": drinks} where drinks is the list of drinks
         or appropriate status code indicating reason for failure
 '''
+@app.route('/drinks')
+def get_drinks():
+    return menu_response('short')
 
 
 '''
@@ -37,6 +95,10 @@ CORS(app)
     returns status code 200 and json {"success": True, "drinks": drinks} where drinks is the list of drinks
         or appropriate status code indicating reason for failure
 '''
+@app.route('/drinks-detail')
+@requires_auth('get:drinks-detail')
+def get_drinks_detail(payload):
+    return menu_response('long')
 
 
 '''
@@ -48,6 +110,24 @@ CORS(app)
     returns status code 200 and json {"success": True, "drinks": drink} where drink an array containing only the newly created drink
         or appropriate status code indicating reason for failure
 '''
+@app.route('/drinks', methods=['POST'])
+@requires_auth('post:drinks')
+def create_drink(payload):
+    body = request.get_json(silent=True) or {}
+    if not body.get('title'):
+        abort(400)
+
+    drink = Drink(title=body['title'], recipe=recipe_from(body))
+    try:
+        drink.insert()
+    except exc.IntegrityError:
+        db.session.rollback()
+        abort(422)
+
+    return jsonify({
+        'success': True,
+        'drinks': [drink.long()]
+    })
 
 
 '''
@@ -61,6 +141,28 @@ CORS(app)
     returns status code 200 and json {"success": True, "drinks": drink} where drink an array containing only the updated drink
         or appropriate status code indicating reason for failure
 '''
+@app.route('/drinks/<int:id>', methods=['PATCH'])
+@requires_auth('patch:drinks')
+def update_drink(payload, id):
+    drink = Drink.query.filter(Drink.id == id).one_or_none()
+    if drink is None:
+        abort(404)
+
+    body = request.get_json(silent=True) or {}
+    if 'title' in body:
+        drink.title = body['title']
+    if 'recipe' in body:
+        drink.recipe = recipe_from(body)
+    try:
+        drink.update()
+    except exc.IntegrityError:
+        db.session.rollback()
+        abort(422)
+
+    return jsonify({
+        'success': True,
+        'drinks': [drink.long()]
+    })
 
 
 '''
@@ -73,6 +175,81 @@ CORS(app)
     returns status code 200 and json {"success": True, "delete": id} where id is the id of the deleted record
         or appropriate status code indicating reason for failure
 '''
+@app.route('/drinks/<int:id>', methods=['DELETE'])
+@requires_auth('delete:drinks')
+def delete_drink(payload, id):
+    drink = Drink.query.filter(Drink.id == id).one_or_none()
+    if drink is None:
+        abort(404)
+
+    drink.delete()
+
+    return jsonify({
+        'success': True,
+        'delete': id
+    })
+
+
+'''
+POST /drinks/import
+    bulk inserts the drinks in an NDJSON request body, one {"title", "recipe"} object per line
+    it should require the 'post:drinks' permission
+    the body is read as it arrives and committed in batches (see import_drinks)
+    returns status code 200 and json {"success": True, "imported": n, "errors": errors} where errors
+        lists the lines that were skipped, i.e. [{"line": 3, "error": "duplicate title 'Water'"}]
+        or status code 422 with the same errors if none of the lines could be imported
+'''
+@app.route('/drinks/import', methods=['POST'])
+@requires_auth('post:drinks')
+def bulk_import_drinks(payload):
+    imported, errors = import_drinks(request.stream,
+                                     request.args.get('batch_size', 500, type=int) or 500)
+    if errors and not imported:
+        return jsonify({
+                        "success": False,
+                        "error": 422,
+                        "message": "unprocessable",
+                        "errors": errors
+                        }), 422
+
+    return jsonify({
+        'success': True,
+        'imported': imported,
+        'errors': errors
+    })
+
+
+'''
+GET /drinks/export
+    streams the whole menu as NDJSON, one drink.long() per line, i.e. for backups
+    it should require the 'get:drinks-detail' permission
+'''
+@app.route('/drinks/export')
+@requires_auth('get:drinks-detail')
+def bulk_export_drinks(payload):
+    return app.response_class(stream_with_context(export_drinks()),
+                              mimetype='application/x-ndjson')
+
+
+'''
+flask import-drinks FILE / flask export-drinks FILE
+    the same import and export from the command line, FILE may be - for stdin/stdout
+'''
+@app.cli.command('import-drinks')
+@click.argument('file', type=click.File('r'))
+@click.option('--batch-size', default=500, show_default=True)
+def import_drinks_command(file, batch_size):
+    imported, errors = import_drinks(file, batch_size)
+    for error in errors:
+        click.echo('line %(line)d: %(error)s' % error, err=True)
+    click.echo('imported %d drinks, skipped %d lines' % (imported, len(errors)), err=True)
+
+
+@app.cli.command('export-drinks')
+@click.argument('file', type=click.File('w'))
+def export_drinks_command(file):
+    for line in export_drinks():
+        file.write(line)
 
 
 ## Error Handling
@@ -98,13 +275,35 @@ def unprocessable(error):
 
 '''
 
+@app.errorhandler(400)
+def bad_request(error):
+    return jsonify({
+                    "success": False, 
+                    "error": 400,
+                    "message": "bad request"
+                    }), 400
+
 '''
 @TODO implement error handler for 404
     error handler should conform to general task above 
 '''
+@app.errorhandler(404)
+def not_found(error):
+    return jsonify({
+                    "success": False, 
+                    "error": 404,
+                    "message": "resource not found"
+                    }), 404
 
 
 '''
 @TODO implement error handler for AuthError
     error handler should conform to general task above 
 '''
+@app.errorhandler(AuthError)
+def auth_error(error):
+    return jsonify({
+                    "success": False, 
+                    "error": error.status_code,
+                    "message": error.error['description']
+                    }), error.status_code
@@ -0,0 +1,87 @@
+import json
+import threading
+import time
+from urllib.request import urlopen
+
+
+class JWKSKeyStore:
+    """Caches the signing keys published at a JWKS url, by key id (kid).
+
+    Keys are fetched once and reused for `ttl` seconds. A token signed with
+    a kid we don't know triggers an early refresh (the issuer may have
+    rotated its keys), but at most once every `min_refresh_interval` seconds
+    so tokens with made-up kids can't make us hammer the issuer. Threads
+    that need a refresh at the same time share a single fetch.
+    """
+
+    def __init__(self, url, ttl=600, min_refresh_interval=30, timeout=5,
+                 clock=time.monotonic):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.clock = clock
+
+        self.keys = {}
+        self.fetched_at = None
+        self.fetches = 0
+        self.refresh_lock = threading.Lock()
+
+    def fetch(self):
+        """Downloads the JWKS and returns the RSA keys it contains by kid
+        """
+        with urlopen(self.url, timeout=self.timeout) as response:
+            return self.parse(json.loads(response.read()))
+
+    @staticmethod
+    def parse(jwks):
+        return {key['kid']: {
+                    'kty': key['kty'],
+                    'kid': key['kid'],
+                    'use': key['use'],
+                    'n': key['n'],
+                    'e': key['e']
+                } for key in jwks['keys'] if key.get('kty') == 'RSA'}
+
+    def reset(self):
+        """Makes the next get_key fetch the keys again (the current ones stay
+        in use until then)
+        """
+        with self.refresh_lock:
+            self.fetched_at = None
+
+    def refresh(self, seen_fetches):
+        """Refreshes the keys unless another thread did since the caller
+        looked at them (seen_fetches), in which case its result is reused.
+        """
+        with self.refresh_lock:
+            if self.fetches != seen_fetches:
+                return
+            try:
+                keys = self.fetch()
+                fetched_at = self.clock()
+            except Exception:
+                # Keep serving the keys we have rather than failing every
+                # request while the issuer is unreachable, and try again
+                # after min_refresh_interval.
+                if not self.keys:
+                    raise
+                keys = self.keys
+                fetched_at = self.clock() - self.ttl + self.min_refresh_interval
+            self.keys = keys
+            self.fetched_at = fetched_at
+            self.fetches += 1
+
+    def get_key(self, kid):
+        """Returns the JWK for kid, or None if the issuer doesn't publish it
+        """
+        fetches, fetched_at = self.fetches, self.fetched_at
+        if fetched_at is None:
+            self.refresh(fetches)
+            return self.keys.get(kid)
+
+        age = self.clock() - fetched_at
+        if age >= self.ttl or (kid not in self.keys and age >= self.min_refresh_interval):
+            self.refresh(fetches)
+
+        return self.keys.get(kid)
@@ -0,0 +1,46 @@
+import re
+from fnmatch import translate
+
+
+def is_pattern(permission):
+    return any(c in permission for c in '*?[')
+
+
+class PermissionRequirement:
+    """The permissions a route requires, compiled once when it is decorated.
+
+    A route can require every permission in `all_of` and at least one of
+    `any_of`. Required permissions may be patterns ('*:drinks' accepts any
+    permission on drinks); exact ones are checked with set operations
+    against the token's permissions, patterns are compiled to regular
+    expressions and matched against them.
+    """
+
+    def __init__(self, permission='', any_of=(), all_of=()):
+        all_of = set(all_of)
+        if permission:
+            all_of.add(permission)
+        any_of = set(any_of)
+
+        self.all_of = frozenset(p for p in all_of if not is_pattern(p))
+        self.all_of_patterns = tuple(re.compile(translate(p)) for p in sorted(all_of) if is_pattern(p))
+        self.any_of = frozenset(p for p in any_of if not is_pattern(p))
+        self.any_of_patterns = tuple(re.compile(translate(p)) for p in sorted(any_of) if is_pattern(p))
+
+    @staticmethod
+    def matches(pattern, granted):
+        return any(pattern.match(p) for p in granted)
+
+    def allows(self, granted):
+        """granted: frozenset of the permissions in a verified token
+        """
+        if not self.all_of <= granted:
+            return False
+        for pattern in self.all_of_patterns:
+            if not self.matches(pattern, granted):
+                return False
+
+        if self.any_of or self.any_of_patterns:
+            return not self.any_of.isdisjoint(granted) or \
+                any(self.matches(pattern, granted) for pattern in self.any_of_patterns)
+        return True
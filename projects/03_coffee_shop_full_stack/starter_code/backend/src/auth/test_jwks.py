@@ -0,0 +1,103 @@
+import threading
+import time
+import unittest
+
+from src.auth.jwks import JWKSKeyStore
+
+
+def make_key(kid):
+    return {'kty': 'RSA', 'kid': kid, 'use': 'sig', 'n': 'n-' + kid, 'e': 'AQAB'}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeJWKSKeyStore(JWKSKeyStore):
+    """Serves `published` instead of downloading jwks.json, counting fetches"""
+
+    def __init__(self, **kwargs):
+        super().__init__('https://issuer.test/.well-known/jwks.json', **kwargs)
+        self.published = [make_key('key-1')]
+        self.delay = 0
+        self.down = False
+        self.fetches_started = 0
+
+    def fetch(self):
+        self.fetches_started += 1
+        time.sleep(self.delay)
+        if self.down:
+            raise OSError('issuer unreachable')
+        return self.parse({'keys': self.published})
+
+
+class JWKSKeyStoreTestCase(unittest.TestCase):
+    """This class represents the JWKS key store test case"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.store = FakeJWKSKeyStore(ttl=600, min_refresh_interval=30, clock=self.clock)
+
+    def test_keys_are_fetched_once(self):
+        for _ in range(5):
+            self.assertEqual(self.store.get_key('key-1'), make_key('key-1'))
+        self.assertEqual(self.store.fetches_started, 1)
+
+    def test_keys_are_refetched_after_ttl(self):
+        self.store.get_key('key-1')
+        self.store.published = [make_key('key-2')]
+
+        self.clock.now += 599
+        self.assertEqual(self.store.get_key('key-1'), make_key('key-1'))
+        self.clock.now += 1
+        self.assertIsNone(self.store.get_key('key-1'))
+        self.assertEqual(self.store.fetches_started, 2)
+
+    def test_unknown_kid_refreshes_rotated_keys(self):
+        self.store.get_key('key-1')
+        self.store.published = [make_key('key-1'), make_key('key-2')]
+        self.clock.now += 31
+
+        self.assertEqual(self.store.get_key('key-2'), make_key('key-2'))
+        self.assertEqual(self.store.fetches_started, 2)
+
+    def test_unknown_kid_refreshes_at_most_once_per_interval(self):
+        self.store.get_key('key-1')
+        for _ in range(5):
+            self.assertIsNone(self.store.get_key('made-up'))
+        self.assertEqual(self.store.fetches_started, 1)
+
+    def test_concurrent_refreshes_share_one_fetch(self):
+        self.store.delay = 0.2
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.store.get_key('key-1')))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [make_key('key-1')] * 10)
+        self.assertEqual(self.store.fetches_started, 1)
+
+    def test_stale_keys_are_kept_when_the_issuer_is_down(self):
+        self.store.get_key('key-1')
+        self.store.down = True
+        self.clock.now += 601
+
+        self.assertEqual(self.store.get_key('key-1'), make_key('key-1'))
+        # and the issuer is asked again after min_refresh_interval, not on every request
+        self.store.get_key('key-1')
+        self.assertEqual(self.store.fetches_started, 2)
+        self.clock.now += 30
+        self.store.get_key('key-1')
+        self.assertEqual(self.store.fetches_started, 3)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import time
+import unittest
+
+from flask import Flask
+
+from src.auth.auth import AuthError, check_permissions, requires_auth, verified_tokens
+from src.auth.permissions import PermissionRequirement
+
+
+class PermissionRequirementTestCase(unittest.TestCase):
+    """This class represents the permission requirement test case"""
+
+    def test_single_permission(self):
+        requirement = PermissionRequirement('patch:drinks')
+
+        self.assertTrue(requirement.allows(frozenset(['get:drinks', 'patch:drinks'])))
+        self.assertFalse(requirement.allows(frozenset(['get:drinks'])))
+
+    def test_any_of(self):
+        requirement = PermissionRequirement(any_of=['patch:drinks', 'post:drinks'])
+
+        self.assertTrue(requirement.allows(frozenset(['post:drinks'])))
+        self.assertTrue(requirement.allows(frozenset(['patch:drinks', 'post:drinks'])))
+        self.assertFalse(requirement.allows(frozenset(['get:drinks'])))
+        self.assertFalse(requirement.allows(frozenset()))
+
+    def test_all_of(self):
+        requirement = PermissionRequirement('get:drinks-detail', all_of=['patch:drinks'])
+
+        self.assertTrue(requirement.allows(frozenset(['get:drinks-detail', 'patch:drinks'])))
+        self.assertFalse(requirement.allows(frozenset(['patch:drinks'])))
+        self.assertFalse(requirement.allows(frozenset(['get:drinks-detail'])))
+
+    def test_all_of_and_any_of(self):
+        requirement = PermissionRequirement(all_of=['get:drinks'], any_of=['patch:drinks', 'delete:drinks'])
+
+        self.assertTrue(requirement.allows(frozenset(['get:drinks', 'delete:drinks'])))
+        self.assertFalse(requirement.allows(frozenset(['get:drinks'])))
+        self.assertFalse(requirement.allows(frozenset(['delete:drinks'])))
+
+    def test_patterns(self):
+        requirement = PermissionRequirement('*:drinks')
+
+        self.assertTrue(requirement.allows(frozenset(['patch:drinks'])))
+        self.assertFalse(requirement.allows(frozenset(['patch:drinks-detail'])))
+        self.assertFalse(requirement.allows(frozenset(['patch:menus'])))
+
+    def test_any_of_patterns(self):
+        requirement = PermissionRequirement(any_of=['admin', 'get:drinks*'])
+
+        self.assertTrue(requirement.allows(frozenset(['get:drinks-detail'])))
+        self.assertTrue(requirement.allows(frozenset(['admin'])))
+        self.assertFalse(requirement.allows(frozenset(['post:drinks'])))
+
+    def test_no_requirement_allows_any_token(self):
+        self.assertTrue(PermissionRequirement().allows(frozenset()))
+
+
+class CheckPermissionsTestCase(unittest.TestCase):
+    """This class represents the check_permissions and requires_auth test case"""
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.token = 'test-token'
+        verified_tokens.clear()
+        verified_tokens.put(self.token, {'exp': time.time() + 3600, 'permissions': ['get:drinks']},
+                            frozenset(['get:drinks']))
+
+    def tearDown(self):
+        verified_tokens.clear()
+
+    def test_check_permissions(self):
+        self.assertTrue(check_permissions(PermissionRequirement('get:drinks'), frozenset(['get:drinks'])))
+
+    def test_403_for_missing_permission(self):
+        with self.assertRaises(AuthError) as raised:
+            check_permissions(PermissionRequirement('patch:drinks'), frozenset(['get:drinks']))
+
+        self.assertEqual(raised.exception.status_code, 403)
+        self.assertEqual(raised.exception.error['code'], 'unauthorized')
+
+    def test_requires_auth(self):
+        @requires_auth('get:drinks')
+        def allowed(payload):
+            return payload['permissions']
+
+        @requires_auth(any_of=['patch:drinks', 'delete:*'])
+        def denied(payload):
+            return payload
+
+        with self.app.test_request_context(headers={'Authorization': 'Bearer ' + self.token}):
+            self.assertEqual(allowed(), ['get:drinks'])
+            with self.assertRaises(AuthError) as raised:
+                denied()
+
+        self.assertEqual(raised.exception.status_code, 403)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
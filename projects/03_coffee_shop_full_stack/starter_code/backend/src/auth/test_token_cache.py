@@ -0,0 +1,93 @@
+import unittest
+
+from src.auth.token_cache import VerifiedTokenCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeKeyStore:
+    """Stand-in for JWKSKeyStore, serving whatever keys the test sets"""
+
+    def __init__(self, keys):
+        self.keys = keys
+
+    def get_key(self, kid):
+        return self.keys.get(kid)
+
+
+def make_key(kid, n='n'):
+    return {'kty': 'RSA', 'kid': kid, 'use': 'sig', 'n': n, 'e': 'AQAB'}
+
+
+class VerifiedTokenCacheTestCase(unittest.TestCase):
+    """This class represents the verified token cache test case"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.key_store = FakeKeyStore({'key-1': make_key('key-1')})
+        self.cache = VerifiedTokenCache(max_entries=2, clock=self.clock, key_store=self.key_store)
+        self.permissions = frozenset(['get:drinks'])
+
+    def put(self, token, exp=1060, kid='key-1'):
+        self.cache.put(token, {'exp': exp, 'token': token}, self.permissions, kid=kid)
+
+    def test_hit_until_exp(self):
+        self.put('token-a')
+
+        self.clock.now = 1059.9
+        self.assertEqual(self.cache.get('token-a'), ({'exp': 1060, 'token': 'token-a'}, self.permissions))
+        self.clock.now = 1060
+        self.assertIsNone(self.cache.get('token-a'))
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_token_without_exp_not_cached(self):
+        self.cache.put('token-a', {'permissions': []}, self.permissions)
+
+        self.assertIsNone(self.cache.get('token-a'))
+
+    def test_least_recently_used_evicted_at_capacity(self):
+        self.put('token-a')
+        self.put('token-b')
+        self.cache.get('token-a')
+        self.put('token-c')
+
+        self.assertIsNotNone(self.cache.get('token-a'))
+        self.assertIsNone(self.cache.get('token-b'))
+        self.assertIsNotNone(self.cache.get('token-c'))
+        self.assertEqual(self.cache.stats()['entries'], 2)
+
+    def test_revoked_key_misses(self):
+        self.put('token-a')
+        del self.key_store.keys['key-1']
+
+        self.assertIsNone(self.cache.get('token-a'))
+
+    def test_changed_key_misses(self):
+        self.put('token-a')
+        self.key_store.keys['key-1'] = make_key('key-1', n='rotated')
+
+        self.assertIsNone(self.cache.get('token-a'))
+
+    def test_refetched_same_key_hits(self):
+        self.put('token-a')
+        self.key_store.keys = {'key-1': make_key('key-1')}
+
+        self.assertIsNotNone(self.cache.get('token-a'))
+
+    def test_stats(self):
+        self.put('token-a')
+        self.cache.get('token-a')
+        self.cache.get('token-b')
+
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 1, 'entries': 1, 'hit_rate': 0.5})
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
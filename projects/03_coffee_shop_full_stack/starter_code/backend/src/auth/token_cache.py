@@ -0,0 +1,92 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class VerifiedTokenCache:
+    """Remembers the payload of tokens that passed verify_decode_jwt, with
+    their permissions normalized to a frozenset.
+
+    Entries are keyed by the SHA-256 digest of the token (the raw token is
+    never kept) and expire at the token's own `exp` claim, so a cached token
+    stops being accepted exactly when verifying it again would fail. Tokens
+    without an `exp` are not cached. At most `max_entries` tokens are kept,
+    least recently used first out.
+
+    With a `key_store` (see jwks.py), an entry also remembers the signing key
+    the token was verified with (its `kid`) and is only served while the
+    store still returns that same key, so a token signed with a key the
+    issuer revoked or replaced misses the cache and is verified again.
+    """
+
+    def __init__(self, max_entries=1024, clock=time.time, key_store=None):
+        self.max_entries = max_entries
+        self.clock = clock
+        self.key_store = key_store
+
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def digest(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        """Returns the cached (payload, permissions) for token, or None
+        """
+        key = self.digest(token)
+        with self.lock:
+            entry = self.entries.get(key)
+
+        # checked without holding the lock, the key store may refetch its keys
+        if entry is not None:
+            payload, permissions, expires, kid, signing_key = entry
+            if expires > self.clock() and self.signing_key(kid) == signing_key:
+                with self.lock:
+                    if key in self.entries:
+                        self.entries.move_to_end(key)
+                    self.hits += 1
+                return payload, permissions
+
+        with self.lock:
+            if entry is not None and self.entries.get(key) is entry:
+                del self.entries[key]
+            self.misses += 1
+        return None
+
+    def signing_key(self, kid):
+        """The key the store currently has for kid (None without a store)
+        """
+        if self.key_store is None or kid is None:
+            return None
+        return self.key_store.get_key(kid)
+
+    def put(self, token, payload, permissions, kid=None):
+        """Caches a verified token until it expires, kid is the id of the
+        key it was verified with
+        """
+        expires = payload.get('exp')
+        if not isinstance(expires, (int, float)):
+            return
+        signing_key = self.signing_key(kid)
+        key = self.digest(token)
+        with self.lock:
+            self.entries[key] = (payload, permissions, expires, kid, signing_key)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'entries': len(self.entries),
+                    'hit_rate': float(self.hits) / lookups if lookups else 0.0}
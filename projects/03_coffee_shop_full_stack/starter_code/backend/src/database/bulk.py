@@ -0,0 +1,104 @@
+import json
+from sqlalchemy import exc
+
+from .models import db, Drink, MenuVersion
+
+'''
+drink_from(row)
+    a new Drink from a decoded import row {"title": string, "recipe": [...]}
+    any other key (i.e. the "id" of an exported drink) is ignored, ids are assigned on insert
+    raises ValueError (RecipeError for the recipe) if the row isn't a valid drink
+'''
+def drink_from(row):
+    if not isinstance(row, dict):
+        raise ValueError('expected a json object')
+    title = row.get('title')
+    if not isinstance(title, str) or not title.strip() or len(title) > 80:
+        raise ValueError('title must be 1 to 80 characters')
+    return Drink(title=title, recipe=row.get('recipe'))
+
+'''
+insert_batch(batch, errors)
+    inserts a batch of (line number, Drink) with a single commit
+    drinks whose title is already taken (in the database or earlier in the batch)
+    are reported in errors instead
+    returns the number of drinks inserted
+'''
+def insert_batch(batch, errors):
+    titles = [drink.title for number, drink in batch]
+    taken = {title for (title,) in db.session.query(Drink.title).filter(Drink.title.in_(titles))}
+
+    accepted = []
+    for number, drink in batch:
+        if drink.title in taken:
+            errors.append({'line': number, 'error': 'duplicate title %r' % drink.title})
+            continue
+        taken.add(drink.title)
+        accepted.append((number, drink))
+
+    db.session.add_all([drink for number, drink in accepted])
+    try:
+        if accepted:
+            MenuVersion.bump()
+        db.session.commit()
+        inserted = len(accepted)
+    except exc.IntegrityError:
+        # another writer took one of the titles since we looked,
+        # retry the batch one drink at a time to find out which
+        db.session.rollback()
+        inserted = 0
+        for number, drink in accepted:
+            db.session.add(drink)
+            try:
+                MenuVersion.bump()
+                db.session.commit()
+                inserted += 1
+            except exc.IntegrityError:
+                db.session.rollback()
+                errors.append({'line': number, 'error': 'duplicate title %r' % drink.title})
+
+    return inserted
+
+'''
+import_drinks(lines, batch_size=500)
+    inserts the drinks in an iterable of NDJSON lines (str or bytes, one drink per line,
+    see drink_from) with one commit per batch_size drinks, reading lines as it goes
+    lines that can't be inserted are skipped and reported
+    returns (imported, errors) where errors is a list of {"line": number, "error": message}
+    EXAMPLE
+        with open('menu.ndjson') as f:
+            imported, errors = import_drinks(f)
+'''
+def import_drinks(lines, batch_size=500):
+    imported = 0
+    errors = []
+    batch = []
+    for number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            drink = drink_from(json.loads(line))
+        except ValueError as e:
+            errors.append({'line': number, 'error': str(e)})
+            continue
+
+        batch.append((number, drink))
+        if len(batch) >= batch_size:
+            imported += insert_batch(batch, errors)
+            batch = []
+
+    if batch:
+        imported += insert_batch(batch, errors)
+    errors.sort(key=lambda error: error['line'])
+    return imported, errors
+
+'''
+export_drinks(batch_size=500)
+    generates the whole menu as NDJSON lines of drink.long(), in id order,
+    loading batch_size drinks at a time
+'''
+def export_drinks(batch_size=500):
+    for drink in Drink.query.order_by(Drink.id).yield_per(batch_size):
+        yield json.dumps(drink.long()) + '\n'
@@ -1,5 +1,8 @@
 import os
-from sqlalchemy import Column, String, Integer
+import uuid
+from sqlalchemy import exc, Column, String, Integer, ForeignKey, Index, JSON
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship, validates
 from flask_sqlalchemy import SQLAlchemy
 import json
 
@@ -28,6 +31,101 @@ db_drop_and_create_all()
 def db_drop_and_create_all():
     db.drop_all()
     db.create_all()
+    MenuVersion.bump()
+    db.session.commit()
+
+'''
+MenuVersion
+    a single row holding the version of the menu, changed in the same transaction as
+    every drink write (Drink.insert/update/delete and the bulk import), so the API can
+    tell whether the menu it serialized is still current with a primary key lookup
+    instead of querying the drinks
+    it lives in the database so that every worker process sees the writes of the others
+    the version is a random token rather than a counter, so a database recreated from
+    scratch never reuses the versions (and ETags) of the one it replaced
+'''
+class MenuVersion(db.Model):
+    __tablename__ = 'menu_version'
+
+    id = Column(Integer, primary_key=True)
+    value = Column(String(32), nullable=False)
+
+    '''
+    current()
+        the current version of the menu
+    '''
+    @classmethod
+    def current(cls):
+        value = db.session.query(cls.value).filter(cls.id == 1).scalar()
+        if value is None:
+            # a database created before the version row existed
+            cls.bump()
+            try:
+                db.session.commit()
+            except exc.IntegrityError:
+                # another worker created it first
+                db.session.rollback()
+            value = db.session.query(cls.value).filter(cls.id == 1).scalar()
+        return value
+
+    '''
+    bump()
+        gives the menu a new version as part of the current transaction, call it before
+        committing a drink write so the version only changes if the write does
+    '''
+    @classmethod
+    def bump(cls):
+        value = uuid.uuid4().hex
+        if not db.session.query(cls).filter(cls.id == 1).update({'value': value}, synchronize_session=False):
+            db.session.add(cls(id=1, value=value))
+
+    '''
+    etag(representation, version)
+        a strong ETag for the menu at version in the given representation ('short' or 'long')
+    '''
+    @staticmethod
+    def etag(representation, version):
+        return '%s-%s' % (representation, version)
+
+'''
+RecipeError
+    raised when a drink is given a recipe that isn't [{'color': string, 'name': string, 'parts': number}]
+'''
+class RecipeError(ValueError):
+    pass
+
+'''
+validate_recipe(recipe)
+    checks a recipe against the schema above, raises RecipeError otherwise
+'''
+def validate_recipe(recipe):
+    if not isinstance(recipe, list) or not recipe:
+        raise RecipeError('recipe must be a non-empty list of ingredients')
+    for ingredient in recipe:
+        if not isinstance(ingredient, dict) or set(ingredient) != {'color', 'name', 'parts'}:
+            raise RecipeError('each ingredient must have exactly a color, a name and parts')
+        if not isinstance(ingredient['color'], str) or not isinstance(ingredient['name'], str):
+            raise RecipeError('ingredient color and name must be strings')
+        if not ingredient['name'].strip() or len(ingredient['name'].strip()) > 80:
+            raise RecipeError('ingredient name must be 1 to 80 characters')
+        if isinstance(ingredient['parts'], bool) or not isinstance(ingredient['parts'], (int, float)) \
+                or ingredient['parts'] <= 0:
+            raise RecipeError('ingredient parts must be a positive number')
+
+'''
+DrinkIngredient
+    one row per ingredient name in a drink's recipe, kept in step with Drink.recipe,
+    so drinks can be looked up by ingredient with an index (see Drink.with_ingredient)
+'''
+class DrinkIngredient(db.Model):
+    __tablename__ = 'drink_ingredient'
+    __table_args__ = (
+        Index('ix_drink_ingredient_name', 'name', 'drink_id'),
+    )
+
+    drink_id = Column(Integer, ForeignKey('drink.id', ondelete='CASCADE'), primary_key=True)
+    # lower case ingredient name
+    name = Column(String(80), primary_key=True)
 
 '''
 Drink
@@ -38,17 +136,42 @@ class Drink(db.Model):
     id = Column(Integer().with_variant(Integer, "sqlite"), primary_key=True)
     # String Title
     title = Column(String(80), unique=True)
-    # the ingredients blob - this stores a lazy json blob
+    # the ingredients, stored natively as json (jsonb on postgres)
     # the required datatype is [{'color': string, 'name':string, 'parts':number}]
-    recipe =  Column(String(180), nullable=False)
+    recipe = Column(JSON().with_variant(JSONB(), 'postgresql'), nullable=False)
+
+    ingredients = relationship(DrinkIngredient, cascade='all, delete-orphan')
+
+    '''
+    recipe validation
+        a recipe is validated when it is assigned (so before it is inserted or updated),
+        and the ingredient rows are rebuilt from it
+        assign a new list to recipe rather than modifying it in place
+    '''
+    @validates('recipe')
+    def check_recipe(self, key, recipe):
+        validate_recipe(recipe)
+        names = sorted({ingredient['name'].strip().lower() for ingredient in recipe})
+        self.ingredients = [DrinkIngredient(name=name) for name in names]
+        return recipe
+
+    '''
+    with_ingredient(name)
+        query for the drinks whose recipe uses the ingredient name (case insensitive)
+        EXAMPLE
+            Drink.with_ingredient('milk').all()
+    '''
+    @classmethod
+    def with_ingredient(cls, name):
+        return cls.query.filter(cls.id.in_(
+            db.session.query(DrinkIngredient.drink_id).filter(DrinkIngredient.name == name.strip().lower())))
 
     '''
     short()
         short form representation of the Drink model
     '''
     def short(self):
-        print(json.loads(self.recipe))
-        short_recipe = [{'color': r['color'], 'parts': r['parts']} for r in json.loads(self.recipe)]
+        short_recipe = [{'color': r['color'], 'parts': r['parts']} for r in self.recipe]
         return {
             'id': self.id,
             'title': self.title,
@@ -63,7 +186,7 @@ class Drink(db.Model):
         return {
             'id': self.id,
             'title': self.title,
-            'recipe': json.loads(self.recipe)
+            'recipe': self.recipe
         }
 
     '''
@@ -77,6 +200,7 @@ class Drink(db.Model):
     '''
     def insert(self):
         db.session.add(self)
+        MenuVersion.bump()
         db.session.commit()
 
     '''
@@ -89,6 +213,7 @@ class Drink(db.Model):
     '''
     def delete(self):
         db.session.delete(self)
+        MenuVersion.bump()
         db.session.commit()
 
     '''
@@ -101,6 +226,7 @@ class Drink(db.Model):
             drink.update()
     '''
     def update(self):
+        MenuVersion.bump()
         db.session.commit()
 
     def __repr__(self):
@@ -0,0 +1,112 @@
+import io
+import json
+import time
+import unittest
+
+from src.api import app
+from src.auth.auth import verified_tokens
+from src.database.bulk import import_drinks, export_drinks
+from src.database.models import db, db_drop_and_create_all, Drink
+
+
+def ndjson(*rows):
+    return ''.join((row if isinstance(row, str) else json.dumps(row)) + '\n' for row in rows)
+
+
+def drink(title, name='water', color='blue'):
+    return {'title': title, 'recipe': [{'color': color, 'name': name, 'parts': 1}]}
+
+
+class BulkImportTestCase(unittest.TestCase):
+    """This class represents the bulk import and export test case"""
+
+    def setUp(self):
+        """Define test variables and initialize app."""
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.client = app.test_client
+        self.token = 'test-manager-token'
+        self.headers = {'Authorization': 'Bearer ' + self.token,
+                        'Content-Type': 'application/x-ndjson'}
+        self.context = app.app_context()
+        self.context.push()
+        db_drop_and_create_all()
+
+        verified_tokens.clear()
+        permissions = ['get:drinks-detail', 'post:drinks']
+        verified_tokens.put(self.token, {'exp': time.time() + 3600, 'permissions': permissions},
+                            frozenset(permissions))
+
+    def tearDown(self):
+        """Executed after reach test"""
+        verified_tokens.clear()
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def titles(self):
+        return [title for (title,) in db.session.query(Drink.title).order_by(Drink.id)]
+
+    def test_malformed_line_is_skipped(self):
+        imported, errors = import_drinks(io.StringIO(ndjson(drink('Water'), '{"title": "Milk",', drink('Tea'))))
+
+        self.assertEqual(imported, 2)
+        self.assertEqual([error['line'] for error in errors], [2])
+        self.assertEqual(self.titles(), ['Water', 'Tea'])
+
+    def test_errors_report_line_numbers(self):
+        lines = ndjson(drink('Water'), '', drink('Milk', name=''), drink('Water'), ['not', 'a', 'drink'])
+        imported, errors = import_drinks(io.StringIO(lines), batch_size=2)
+
+        self.assertEqual(imported, 1)
+        self.assertEqual([error['line'] for error in errors], [3, 4, 5])
+        self.assertIn('duplicate title', errors[1]['error'])
+
+    def test_import_endpoint_reports_skipped_lines(self):
+        res = self.client().post('/drinks/import', headers=self.headers,
+                                 data=ndjson(drink('Water'), {'title': 'Milk', 'recipe': []}))
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['imported'], 1)
+        self.assertEqual([error['line'] for error in data['errors']], [2])
+
+    def test_422_for_invalid_recipe(self):
+        res = self.client().post('/drinks/import', headers=self.headers,
+                                 data=ndjson({'title': 'Milk', 'recipe': [{'color': 'white', 'name': 'milk'}]}))
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 422)
+        self.assertFalse(data['success'])
+        self.assertEqual([error['line'] for error in data['errors']], [1])
+        self.assertEqual(self.titles(), [])
+
+    def test_reimport_is_idempotent(self):
+        lines = ndjson(drink('Water'), drink('Milk', name='milk', color='white'))
+        first = self.client().post('/drinks/import', headers=self.headers, data=lines)
+        second = self.client().post('/drinks/import', headers=self.headers, data=lines)
+
+        self.assertEqual(json.loads(first.data)['imported'], 2)
+        self.assertEqual(second.status_code, 422)
+        self.assertEqual(json.loads(second.data)['errors'],
+                         [{'line': 1, 'error': "duplicate title 'Water'"},
+                          {'line': 2, 'error': "duplicate title 'Milk'"}])
+        self.assertEqual(self.titles(), ['Water', 'Milk'])
+
+    def test_export_import_round_trip(self):
+        import_drinks(io.StringIO(ndjson(drink('Water'), drink('Latte', name='milk', color='white'))))
+        res = self.client().get('/drinks/export', headers=self.headers)
+        exported = res.get_data(as_text=True)
+
+        db.drop_all()
+        db.create_all()
+        imported, errors = import_drinks(io.StringIO(exported))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.mimetype, 'application/x-ndjson')
+        self.assertEqual((imported, errors), (2, []))
+        self.assertEqual(''.join(export_drinks()), exported)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import json
+import time
+import unittest
+
+from src.api import app, menu_bodies
+from src.auth.auth import verified_tokens
+from src.database.models import db, db_drop_and_create_all, Drink, MenuVersion
+
+
+class MenuTestCase(unittest.TestCase):
+    """This class represents the drinks menu test case"""
+
+    def setUp(self):
+        """Define test variables and initialize app."""
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.client = app.test_client
+        self.token = 'test-barista-token'
+        self.headers = {'Authorization': 'Bearer ' + self.token}
+
+        with app.app_context():
+            db_drop_and_create_all()
+            Drink(title='Water', recipe=[{'color': 'blue', 'name': 'water', 'parts': 1}]).insert()
+        menu_bodies.clear()
+        verified_tokens.clear()
+        permissions = ['get:drinks-detail', 'post:drinks', 'patch:drinks', 'delete:drinks']
+        verified_tokens.put(self.token, {'exp': time.time() + 3600, 'permissions': permissions},
+                            frozenset(permissions))
+
+    def tearDown(self):
+        """Executed after reach test"""
+        verified_tokens.clear()
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def version(self):
+        with app.app_context():
+            return MenuVersion.current()
+
+    def test_get_drinks_sets_etag(self):
+        res = self.client().get('/drinks')
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([drink['title'] for drink in data['drinks']], ['Water'])
+        self.assertIsNotNone(res.headers.get('ETag'))
+
+    def test_304_for_matching_if_none_match(self):
+        etag = self.client().get('/drinks').headers['ETag']
+        res = self.client().get('/drinks', headers={'If-None-Match': etag})
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.data, b'')
+        self.assertEqual(res.headers['ETag'], etag)
+
+    def test_representations_have_distinct_etags(self):
+        short = self.client().get('/drinks').headers['ETag']
+        res = self.client().get('/drinks-detail', headers=dict(self.headers, **{'If-None-Match': short}))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res.headers['ETag'], short)
+
+    def test_drink_writes_bump_version_and_etag(self):
+        etag = self.client().get('/drinks').headers['ETag']
+        versions = set()
+        res = self.client().post('/drinks', headers=self.headers, json={
+            'title': 'Milk', 'recipe': [{'color': 'white', 'name': 'milk', 'parts': 1}]})
+        drink_id = json.loads(res.data)['drinks'][0]['id']
+        versions.add(self.version())
+        after_insert = self.client().get('/drinks', headers={'If-None-Match': etag})
+        self.client().patch('/drinks/%d' % drink_id, headers=self.headers, json={'title': 'Oat Milk'})
+        versions.add(self.version())
+        after_update = self.client().get('/drinks', headers={'If-None-Match': after_insert.headers['ETag']})
+        self.client().delete('/drinks/%d' % drink_id, headers=self.headers)
+        versions.add(self.version())
+        after_delete = self.client().get('/drinks', headers={'If-None-Match': after_update.headers['ETag']})
+
+        self.assertEqual(len(versions), 3)
+        for res, titles in [(after_insert, ['Water', 'Milk']),
+                            (after_update, ['Water', 'Oat Milk']),
+                            (after_delete, ['Water'])]:
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual([drink['title'] for drink in json.loads(res.data)['drinks']], titles)
+        self.assertEqual(len({etag, after_insert.headers['ETag'], after_update.headers['ETag'],
+                              after_delete.headers['ETag']}), 4)
+
+    def test_write_from_another_worker_changes_etag(self):
+        etag = self.client().get('/drinks').headers['ETag']
+        with app.app_context():
+            # what Drink.insert in another process leaves in the database,
+            # without going through this process' session
+            db.session.execute(Drink.__table__.insert(), {
+                'title': 'Milk', 'recipe': [{'color': 'white', 'name': 'milk', 'parts': 1}]})
+            db.session.execute(MenuVersion.__table__.update().values(value='from-another-worker'))
+            db.session.commit()
+        res = self.client().get('/drinks', headers={'If-None-Match': etag})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([drink['title'] for drink in json.loads(res.data)['drinks']], ['Water', 'Milk'])
+        self.assertNotEqual(res.headers['ETag'], etag)
+
+    def test_rejected_write_keeps_etag(self):
+        etag = self.client().get('/drinks').headers['ETag']
+        res = self.client().post('/drinks', headers=self.headers, json={
+            'title': 'Water', 'recipe': [{'color': 'blue', 'name': 'water', 'parts': 1}]})
+
+        self.assertEqual(res.status_code, 422)
+        self.assertEqual(self.client().get('/drinks', headers={'If-None-Match': etag}).status_code, 304)
+
+
+class AuthHeaderTestCase(unittest.TestCase):
+    """This class represents the malformed authorization header test case"""
+
+    def setUp(self):
+        """Define test variables and initialize app."""
+        self.client = app.test_client
+        verified_tokens.clear()
+
+    def assert_401(self, authorization):
+        res = self.client().get('/drinks-detail', headers={'Authorization': authorization})
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 401)
+        self.assertFalse(data['success'])
+
+    def test_401_for_malformed_bearer_token(self):
+        self.assert_401('Bearer not-a-jwt')
+
+    def test_401_for_whitespace_only_header(self):
+        self.assert_401('   ')
+
+    def test_401_for_missing_header(self):
+        res = self.client().get('/drinks-detail')
+
+        self.assertEqual(res.status_code, 401)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()